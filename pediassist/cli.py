@@ -22,7 +22,7 @@ from .core.diagnosis_parser import DiagnosisParser
 from .core.treatment_generator import TreatmentGenerator
 from .core.communication_engine import CommunicationEngine
 from .core.delegation_manager import DelegationManager
-from .database import DatabaseManager
+from .database import get_database_manager
 from .llm.provider import LLMManager
 from .llm.client import LLMClient
 from .llm.cache import SmartQueryCache
@@ -38,7 +38,7 @@ class PediAssistCLI:
     
     def __init__(self):
         self.settings = settings
-        self.db_manager = DatabaseManager(settings.database_url)
+        self.db_manager = get_database_manager(settings.database_url)
         self.treatment_generator = TreatmentGenerator()
         self.llm_manager = self._setup_llm_manager()
         self.llm_client = self._setup_llm_client()
@@ -131,6 +131,10 @@ class PediAssistCLI:
                 progress.update(task2, description=f"LLM connection failed: {e}")
                 logger.warning("LLM connection failed", error=str(e))
     
+    async def shutdown(self):
+        """Flush pending usage records and release database connections"""
+        await self.db_manager.aclose()
+    
     def display_welcome(self):
         """Display welcome message and system status"""
         welcome_text = Text()
@@ -406,6 +410,8 @@ def diagnose(ctx, age, sex, weight, chief_complaint, history, complexity, output
         except Exception as e:
             console.print(f"[bold red]Error:[/bold red] {str(e)}")
             logger.error("Diagnosis failed", error=str(e))
+        finally:
+            await cli_instance.shutdown()
     
     # Run the async function
     asyncio.run(run_diagnosis())
@@ -444,6 +450,8 @@ async def query(ctx, query, age, complexity):
             
     except Exception as e:
         console.print(f"[bold red]Error:[/bold red] {str(e)}")
+    finally:
+        await cli_instance.shutdown()
 
 @cli.command()
 @click.pass_context
@@ -471,9 +479,15 @@ def init_db(ctx):
     """Initialize the database with sample data"""
     cli_instance = ctx.obj['cli']
     
+    async def create_tables():
+        try:
+            await cli_instance.db_manager.create_tables()
+        finally:
+            await cli_instance.shutdown()
+    
     try:
         with console.status("[bold green]Initializing database...") as status:
-            asyncio.run(cli_instance.db_manager.create_tables())
+            asyncio.run(create_tables())
             
         console.print("[bold green]Database initialized successfully![/bold green]")
         console.print("Database tables have been created.")
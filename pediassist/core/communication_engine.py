@@ -2,17 +2,56 @@
 Patient communication engine for generating age-appropriate explanations
 """
 
+import functools
 import json
 import re
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
+import textwrap
+import time
+from typing import Dict, FrozenSet, List, Mapping, Optional, Any, Set, Tuple
+from dataclasses import asdict, dataclass, field, replace
 from enum import Enum
 import structlog
-from datetime import datetime
-import random
+from datetime import datetime, timezone
+from collections import defaultdict
+from types import MappingProxyType
+
+from .keyword_matcher import KeywordMatcher
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 logger = structlog.get_logger(__name__)
 
+_utcnow = datetime.utcnow
+
+# Built-in templates share one load timestamp instead of each calling utcnow()
+_LOAD_TIME = _utcnow()
+
+
+@functools.lru_cache(maxsize=1)
+def _format_utc_seconds(epoch_seconds: int) -> str:
+    """Format a whole-second UTC epoch as a naive ISO-8601 string"""
+    return datetime.fromtimestamp(epoch_seconds, timezone.utc).replace(tzinfo=None).isoformat()
+
+
+def _utc_timestamp() -> str:
+    """Current UTC time as ISO-8601, formatted at most once per second"""
+    return _format_utc_seconds(time.time_ns() // 1_000_000_000)
+
+_CHILD_REFERENCE_PATTERN = re.compile(r"([Yy]our) child")
+# Single-character typographic normalizations applied once to template text at load
+_TEXT_NORMALIZATION = str.maketrans({
+    "\u2013": "-",
+    "\u2014": "-",
+    "\u2018": "'",
+    "\u2019": "'",
+    "\u201c": '"',
+    "\u201d": '"'
+})
+
 class CommunicationStyle(Enum):
     """Communication style options"""
     SIMPLE = "simple"
@@ -29,48 +68,97 @@ class LanguageLevel(Enum):
     PARENT = "parent"  # Parent/caregiver level
     PROFESSIONAL = "professional"  # Healthcare professional level
 
-@dataclass
+# Reading speed estimates (words per minute)
+_READING_SPEEDS: Dict[LanguageLevel, int] = {
+    LanguageLevel.TODDLER: 30,
+    LanguageLevel.PRESCHOOL: 50,
+    LanguageLevel.SCHOOL_AGE: 80,
+    LanguageLevel.ADOLESCENT: 120,
+    LanguageLevel.PARENT: 150,
+    LanguageLevel.PROFESSIONAL: 200
+}
+
+# Age group to language level; anything unlisted is addressed at parent level
+_LEVEL_MAP: Dict[str, LanguageLevel] = {
+    "toddler": LanguageLevel.TODDLER,
+    "preschool": LanguageLevel.PRESCHOOL,
+    "school_age": LanguageLevel.SCHOOL_AGE,
+    "adolescent": LanguageLevel.ADOLESCENT,
+    "parent": LanguageLevel.PARENT
+}
+
+@dataclass(slots=True, frozen=True)
 class CommunicationTemplate:
     """Communication template structure"""
     template_id: str
     name: str
     description: str
-    age_groups: List[str]
-    conditions: List[str]
+    age_groups: Tuple[str, ...]
+    conditions: Tuple[str, ...]
     style: CommunicationStyle
     language_level: LanguageLevel
     template_text: str
-    key_points: List[str]
+    key_points: Tuple[str, ...]
     call_to_action: str
-    warnings: List[str]
+    warnings: Tuple[str, ...]
     confidence_score: float
     last_updated: datetime
+    conditions_lc: FrozenSet[str] = field(init=False, repr=False)
+    age_groups_lc: FrozenSet[str] = field(init=False, repr=False)
+    
+    def __post_init__(self):
+        # Templates are shared between engines, so sequence fields are stored immutably
+        for name in ("age_groups", "conditions", "key_points", "warnings"):
+            object.__setattr__(self, name, tuple(getattr(self, name)))
+        # Case-folded once so template matching never lowercases per call
+        object.__setattr__(self, "conditions_lc", frozenset(cond.lower() for cond in self.conditions))
+        object.__setattr__(self, "age_groups_lc", frozenset(ag.lower() for ag in self.age_groups))
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class GeneratedCommunication:
     """Generated communication output"""
     template_id: str
     title: str
     main_content: str
-    key_points: List[str]
+    key_points: Tuple[str, ...]
     call_to_action: str
-    warnings: List[str]
+    warnings: Tuple[str, ...]
     age_appropriate: bool
     language_level: LanguageLevel
     estimated_reading_time: int
     confidence_score: float
     metadata: Dict[str, Any]
+    
+    def as_json(self) -> bytes:
+        """Serialize the communication to JSON bytes, using orjson when installed"""
+        data = asdict(self)
+        data["language_level"] = self.language_level.value
+        if ORJSON_AVAILABLE:
+            return orjson.dumps(data, default=str)
+        return json.dumps(data, default=str).encode("utf-8")
 
 class CommunicationEngine:
     """Advanced patient communication generator"""
     
     def __init__(self):
+        # Static content is built once per process and shared read-only across engines
         self.templates = self._load_communication_templates()
         self.age_appropriate_explanations = self._load_age_appropriate_explanations()
         self.medical_translations = self._load_medical_translations()
         self.reassurance_phrases = self._load_reassurance_phrases()
+        self._reassurance_cursor: Dict[str, int] = defaultdict(int)
+        self._level_patterns = self._compile_level_patterns()
+        self._templates_by_age_style, self._template_dispatch = self._build_template_index()
+        # Template selection is a pure function of its three string inputs
+        self._cached_select_template = functools.lru_cache(maxsize=512)(self._find_template)
+        # Template selection plus language adaptation is deterministic per request shape
+        self._cached_build_core = functools.lru_cache(maxsize=256)(self._build_core)
+        # Specialized builders for generate_communication_fast, filled on first use of each key
+        self._fast_generate: Dict[Tuple[str, str, str], functools.partial] = {}
     
-    def _load_communication_templates(self) -> Dict[str, CommunicationTemplate]:
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _load_communication_templates() -> Mapping[str, CommunicationTemplate]:
         """Load communication templates for various scenarios"""
         templates = {
             "fever_explanation": CommunicationTemplate(
@@ -100,7 +188,7 @@ class CommunicationEngine:
                 call_to_action="Call us if fever lasts more than 3 days or your child seems very sick",
                 warnings=["Seek immediate care for fever >104°F or in infants <3 months"],
                 confidence_score=0.9,
-                last_updated=datetime.utcnow()
+                last_updated=_LOAD_TIME
             ),
             
             "medication_safety": CommunicationTemplate(
@@ -132,7 +220,7 @@ class CommunicationEngine:
                 call_to_action="Call our office if you have any questions about giving medicine",
                 warnings=["Call poison control immediately if too much medicine is given"],
                 confidence_score=0.95,
-                last_updated=datetime.utcnow()
+                last_updated=_LOAD_TIME
             ),
             
             "procedure_explanation": CommunicationTemplate(
@@ -161,7 +249,7 @@ class CommunicationEngine:
                 call_to_action="Let us know if you feel scared or uncomfortable",
                 warnings=["Some procedures may require preparation - follow instructions carefully"],
                 confidence_score=0.85,
-                last_updated=datetime.utcnow()
+                last_updated=_LOAD_TIME
             ),
             
             "emergency_instructions": CommunicationTemplate(
@@ -192,15 +280,24 @@ class CommunicationEngine:
                 call_to_action="Go to emergency room immediately - do not delay",
                 warnings=["This is a medical emergency - do not wait for symptoms to improve"],
                 confidence_score=0.98,
-                last_updated=datetime.utcnow()
+                last_updated=_LOAD_TIME
             )
         }
         
-        return templates
+        # Normalize the triple-quoted bodies once here rather than on every generation
+        return MappingProxyType({
+            template_id: replace(
+                template,
+                template_text=textwrap.dedent(template.template_text).strip().translate(_TEXT_NORMALIZATION)
+            )
+            for template_id, template in templates.items()
+        })
     
-    def _load_age_appropriate_explanations(self) -> Dict[str, Dict[str, str]]:
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _load_age_appropriate_explanations() -> Mapping[str, Mapping[str, str]]:
         """Load age-appropriate medical explanations"""
-        return {
+        explanations = {
             "fever": {
                 "toddler": "Your body is hot because it's fighting germs!",
                 "preschool": "You have a fever - your body is working hard to fight off sickness.",
@@ -223,10 +320,15 @@ class CommunicationEngine:
                 "parent": "Antibiotics are medications that treat bacterial infections by killing bacteria or preventing their reproduction."
             }
         }
+        return MappingProxyType({
+            concept: MappingProxyType(by_age) for concept, by_age in explanations.items()
+        })
     
-    def _load_medical_translations(self) -> Dict[str, str]:
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _load_medical_translations() -> Mapping[str, str]:
         """Load medical term translations to plain language"""
-        return {
+        return MappingProxyType({
             "febrile": "has a fever",
             "afebrile": "no fever",
             "acute": "sudden or recent",
@@ -247,59 +349,131 @@ class CommunicationEngine:
             "adverse reaction": "side effect",
             "efficacy": "how well it works",
             "tolerability": "how well it's tolerated"
-        }
+        })
     
-    def _load_reassurance_phrases(self) -> Dict[str, List[str]]:
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _load_reassurance_phrases() -> Mapping[str, Tuple[str, ...]]:
         """Load reassuring phrases for different situations"""
-        return {
-            "general": [
+        return MappingProxyType({
+            "general": (
                 "This is a common condition in children",
                 "Most children recover completely",
                 "Your child is in good hands",
                 "We're here to help your child feel better",
                 "This treatment has helped many children"
-            ],
-            "procedure": [
+            ),
+            "procedure": (
                 "This will be over quickly",
                 "You're being very brave",
                 "The doctor is very gentle",
                 "We'll explain everything first",
                 "You can ask us to stop if you need to"
-            ],
-            "illness": [
+            ),
+            "illness": (
                 "Your child's body is working hard to get better",
                 "This is temporary and will pass",
                 "Many children have gone through this successfully",
                 "Your child is responding well to treatment",
                 "We're seeing improvement already"
-            ]
+            )
+        })
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _load_level_simplifications() -> Dict[LanguageLevel, Dict[str, str]]:
+        """Load per-level term substitutions used to simplify language"""
+        return {
+            LanguageLevel.TODDLER: {
+                "temperature": "temperature (how hot your body is)",
+                "infection": "germs making you sick",
+                "medicine": "medicine to help you feel better",
+                "doctor": "doctor (the person who helps you feel better)"
+            },
+            LanguageLevel.PRESCHOOL: {
+                "immune system": "your body's superhero team",
+                "bacteria": "tiny bugs that can make you sick",
+                "virus": "tiny germs that can make you sick",
+                "fever": "your body getting hot to fight germs"
+            },
+            LanguageLevel.SCHOOL_AGE: {
+                "immune system": "your immune system (your body's defense team)",
+                "antibiotic": "antibiotic (medicine that kills bacteria)",
+                "inflammation": "inflammation (when part of your body gets red and swollen)"
+            }
         }
     
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _compile_level_patterns() -> Mapping[LanguageLevel, Tuple[re.Pattern, Dict[str, str]]]:
+        """Compile each level's substitutions into a single alternation pattern"""
+        patterns = {}
+        for level, table in CommunicationEngine._load_level_simplifications().items():
+            # Longest terms first so overlapping terms prefer the most specific match
+            alternation = "|".join(re.escape(term) for term in sorted(table, key=len, reverse=True))
+            patterns[level] = (re.compile(alternation), table)
+        return MappingProxyType(patterns)
+    
+    def _apply_level_substitutions(self, text: str, language_level: LanguageLevel) -> str:
+        """Apply a level's term substitutions in one pass over the text"""
+        pattern, table = self._level_patterns[language_level]
+        return pattern.sub(lambda match: table[match.group(0)], text)
+    
     def select_template(self, condition: str, age_group: str, communication_style: str = "reassuring") -> Optional[CommunicationTemplate]:
         """Select appropriate communication template"""
-        # Find templates matching the condition and age group
-        matching_templates = []
-        
-        for template in self.templates.values():
-            # Check if condition matches
-            condition_match = any(cond.lower() in condition.lower() for cond in template.conditions)
-            
-            # Check if age group matches
-            age_match = age_group.lower() in [ag.lower() for ag in template.age_groups]
-            
-            # Check if style matches (or use default)
-            style_match = (template.style.value == communication_style or 
-                          communication_style == "auto")
-            
-            if condition_match and age_match and style_match:
-                matching_templates.append(template)
-        
-        if not matching_templates:
+        return self._cached_select_template(condition, age_group, communication_style)
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _build_template_index() -> Tuple[Mapping[Tuple[str, str], Tuple[CommunicationTemplate, ...]],
+                                         Mapping[Tuple[str, str, str], CommunicationTemplate]]:
+        """Index templates by (age_group, style) and precompute exact-condition dispatch"""
+        # Highest confidence first so the first condition match is the best match
+        templates = CommunicationEngine._load_communication_templates()
+        ranked = sorted(templates.values(), key=lambda t: t.confidence_score, reverse=True)
+        
+        by_age_style: Dict[Tuple[str, str], List[CommunicationTemplate]] = {}
+        for template in ranked:
+            for age_group in template.age_groups_lc:
+                for style in (template.style.value, "auto"):
+                    by_age_style.setdefault((age_group, style), []).append(template)
+        
+        # Every known condition keyword resolves directly to its best template
+        dispatch: Dict[Tuple[str, str, str], CommunicationTemplate] = {}
+        known_conditions = {cond for template in ranked for cond in template.conditions_lc}
+        for (age_group, style), candidates in by_age_style.items():
+            for condition in known_conditions:
+                match = CommunicationEngine._first_condition_match(condition, candidates)
+                if match:
+                    dispatch[(condition, age_group, style)] = match
+        
+        return (MappingProxyType({key: tuple(candidates) for key, candidates in by_age_style.items()}),
+                MappingProxyType(dispatch))
+    
+    @staticmethod
+    def _first_condition_match(condition_lc: str, candidates: List[CommunicationTemplate]) -> Optional[CommunicationTemplate]:
+        """Return the first candidate with a condition keyword contained in the condition"""
+        for template in candidates:
+            if any(cond in condition_lc for cond in template.conditions_lc):
+                return template
+        return None
+    
+    def _find_template(self, condition: str, age_group: str, communication_style: str) -> CommunicationTemplate:
+        """Look up the best matching template, falling back to a generic template"""
+        condition_lc = condition.lower()
+        age_group_lc = age_group.lower()
+        
+        template = self._template_dispatch.get((condition_lc, age_group_lc, communication_style))
+        if template is None:
+            # Free-text conditions: substring match against the ranked candidates
+            candidates = self._templates_by_age_style.get((age_group_lc, communication_style), ())
+            template = self._first_condition_match(condition_lc, candidates)
+        
+        if template is None:
             # Return a generic template if no specific match
             return self._create_generic_template(condition, age_group, communication_style)
         
-        # Return the best matching template (highest confidence score)
-        return max(matching_templates, key=lambda t: t.confidence_score)
+        return template
     
     def _create_generic_template(self, condition: str, age_group: str, style: str) -> CommunicationTemplate:
         """Create a generic template when no specific match is found"""
@@ -316,22 +490,22 @@ class CommunicationEngine:
             call_to_action="Contact our office if you have concerns",
             warnings=["Seek emergency care for severe symptoms"],
             confidence_score=0.5,
-            last_updated=datetime.utcnow()
+            last_updated=_utcnow()
         )
     
     def _get_language_level(self, age_group: str) -> LanguageLevel:
         """Get appropriate language level for age group"""
-        level_map = {
-            "toddler": LanguageLevel.TODDLER,
-            "preschool": LanguageLevel.PRESCHOOL,
-            "school_age": LanguageLevel.SCHOOL_AGE,
-            "adolescent": LanguageLevel.ADOLESCENT,
-            "parent": LanguageLevel.PARENT
-        }
-        return level_map.get(age_group, LanguageLevel.PARENT)
+        return _LEVEL_MAP.get(age_group, LanguageLevel.PARENT)
     
     def adapt_language(self, text: str, language_level: LanguageLevel, age_group: str) -> str:
-        """Adapt language complexity to appropriate level"""
+        """Adapt language complexity to appropriate level
+        
+        Professional-level text is returned unchanged: clinicians read the
+        original terminology, so no plain-language translation is applied.
+        """
+        if language_level == LanguageLevel.PROFESSIONAL:
+            return text
+        
         # Replace medical terms with age-appropriate explanations
         for medical_term, plain_language in self.medical_translations.items():
             text = re.sub(rf"\b{medical_term}\b", plain_language, text, flags=re.IGNORECASE)
@@ -351,30 +525,19 @@ class CommunicationEngine:
     def _simplify_for_toddler(self, text: str) -> str:
         """Simplify language for toddlers (2-3 years)"""
         # Use very simple words and short sentences
-        simplifications = {
-            "temperature": "temperature (how hot your body is)",
-            "infection": "germs making you sick",
-            "medicine": "medicine to help you feel better",
-            "doctor": "doctor (the person who helps you feel better)"
-        }
-        
-        for complex_term, simple_term in simplifications.items():
-            text = text.replace(complex_term, simple_term)
+        text = self._apply_level_substitutions(text, LanguageLevel.TODDLER)
         
-        # Break into very short sentences
-        sentences = text.split('. ')
+        # Break into very short sentences; only sentences long enough to hold
+        # more than 10 words are tokenized
         simplified_sentences = []
         
-        for sentence in sentences:
-            if len(sentence) > 20:
+        for sentence in text.split('. '):
+            words = sentence.split() if len(sentence) > 20 else ()
+            if len(words) > 10:
                 # Break long sentences
-                words = sentence.split()
-                if len(words) > 10:
-                    mid_point = len(words) // 2
-                    simplified_sentences.append(' '.join(words[:mid_point]) + '.')
-                    simplified_sentences.append(' '.join(words[mid_point:]) + '.')
-                else:
-                    simplified_sentences.append(sentence + '.')
+                mid_point = len(words) // 2
+                simplified_sentences.append(' '.join(words[:mid_point]) + '.')
+                simplified_sentences.append(' '.join(words[mid_point:]) + '.')
             else:
                 simplified_sentences.append(sentence + '.')
         
@@ -383,31 +546,12 @@ class CommunicationEngine:
     def _simplify_for_preschool(self, text: str) -> str:
         """Simplify language for preschoolers (3-5 years)"""
         # Use simple analogies and concrete examples
-        analogies = {
-            "immune system": "your body's superhero team",
-            "bacteria": "tiny bugs that can make you sick",
-            "virus": "tiny germs that can make you sick",
-            "fever": "your body getting hot to fight germs"
-        }
-        
-        for complex_term, analogy in analogies.items():
-            text = text.replace(complex_term, analogy)
-        
-        return text
+        return self._apply_level_substitutions(text, LanguageLevel.PRESCHOOL)
     
     def _simplify_for_school_age(self, text: str) -> str:
         """Adapt language for school-age children (6-12 years)"""
         # Add explanations but keep it engaging
-        explanations = {
-            "immune system": "your immune system (your body's defense team)",
-            "antibiotic": "antibiotic (medicine that kills bacteria)",
-            "inflammation": "inflammation (when part of your body gets red and swollen)"
-        }
-        
-        for complex_term, explanation in explanations.items():
-            text = text.replace(complex_term, explanation)
-        
-        return text
+        return self._apply_level_substitutions(text, LanguageLevel.SCHOOL_AGE)
     
     def _adapt_for_adolescent(self, text: str) -> str:
         """Adapt language for adolescents (13-18 years)"""
@@ -418,46 +562,40 @@ class CommunicationEngine:
         """Add appropriate reassurance to communication"""
         reassurance_phrases = self.reassurance_phrases.get(situation, self.reassurance_phrases["general"])
         
-        # Add 1-2 reassuring phrases
-        selected_phrases = random.sample(reassurance_phrases, min(2, len(reassurance_phrases)))
+        # Add 1-2 reassuring phrases, rotating through the list so wording varies between calls
+        phrase_count = len(reassurance_phrases)
+        cursor = self._reassurance_cursor[situation]
+        selected_phrases = [reassurance_phrases[(cursor + offset) % phrase_count]
+                            for offset in range(min(2, phrase_count))]
+        self._reassurance_cursor[situation] = cursor + len(selected_phrases)
         
         # Insert reassurance at appropriate points
         sentences = text.split('. ')
-        if len(sentences) > 2:
-            # Insert after first sentence
-            sentences.insert(1, selected_phrases[0])
-            if len(selected_phrases) > 1 and len(sentences) > 4:
-                sentences.insert(-2, selected_phrases[1])
-        
-        return '. '.join(sentences)
+        if len(sentences) <= 2:
+            return text
+        
+        # Insert after first sentence, and before the last two sentences when long enough;
+        # assembled by slicing and joined once rather than shifting the list with insert()
+        parts = [sentences[0], selected_phrases[0]]
+        if len(selected_phrases) > 1 and len(sentences) > 3:
+            parts.extend(sentences[1:-2])
+            parts.append(selected_phrases[1])
+            parts.extend(sentences[-2:])
+        else:
+            parts.extend(sentences[1:])
+        
+        return '. '.join(parts)
     
     def estimate_reading_time(self, text: str, language_level: LanguageLevel) -> int:
         """Estimate reading time in minutes"""
         word_count = len(text.split())
         
-        # Reading speed estimates (words per minute)
-        reading_speeds = {
-            LanguageLevel.TODDLER: 30,
-            LanguageLevel.PRESCHOOL: 50,
-            LanguageLevel.SCHOOL_AGE: 80,
-            LanguageLevel.ADOLESCENT: 120,
-            LanguageLevel.PARENT: 150,
-            LanguageLevel.PROFESSIONAL: 200
-        }
-        
-        speed = reading_speeds.get(language_level, 150)
-        reading_time = word_count / speed
+        reading_time = word_count / _READING_SPEEDS.get(language_level, 150)
         
         return max(1, int(round(reading_time)))
     
-    def generate_communication(self, condition: str, age_group: str, communication_style: str = "reassuring", 
-                             patient_context: Optional[Dict[str, Any]] = None) -> GeneratedCommunication:
-        """Generate age-appropriate patient communication"""
-        logger.info("Generating patient communication", 
-                   condition=condition, 
-                   age_group=age_group, 
-                   style=communication_style)
-        
+    def _build_core(self, condition: str, age_group: str, communication_style: str) -> Tuple[CommunicationTemplate, str, int]:
+        """Select the template and adapt its language, before any per-call variation"""
         # Select appropriate template
         template = self.select_template(condition, age_group, communication_style)
         if not template:
@@ -467,6 +605,47 @@ class CommunicationEngine:
         # Adapt language to appropriate level
         adapted_text = self.adapt_language(template.template_text, template.language_level, age_group)
         
+        return template, adapted_text, self.estimate_reading_time(adapted_text, template.language_level)
+    
+    def generate_communication(self, condition: str, age_group: str, communication_style: str = "reassuring", 
+                             patient_context: Optional[Dict[str, Any]] = None) -> GeneratedCommunication:
+        """Generate age-appropriate patient communication"""
+        logger.info("Generating patient communication", 
+                   condition=condition, 
+                   age_group=age_group, 
+                   style=communication_style)
+        
+        template, adapted_text, reading_time = self._cached_build_core(condition, age_group, communication_style)
+        return self._finalize_communication(template, adapted_text, reading_time,
+                                            condition, age_group, communication_style, patient_context)
+    
+    def generate_communication_fast(self, condition: str, age_group: str, communication_style: str = "reassuring",
+                                    patient_context: Optional[Dict[str, Any]] = None) -> GeneratedCommunication:
+        """Generate communication from builders specialized per dispatch key
+        
+        Known (condition, age_group, style) combinations skip template selection and
+        language adaptation after their first use; unseen combinations fall back to
+        generate_communication.
+        """
+        key = (condition.lower(), age_group.lower(), communication_style)
+        builder = self._fast_generate.get(key)
+        if builder is None:
+            if key not in self._template_dispatch:
+                return self.generate_communication(condition, age_group, communication_style, patient_context)
+            builder = self._fast_generate[key] = functools.partial(
+                self._finalize_communication, *self._cached_build_core(*key)
+            )
+        
+        logger.info("Generating patient communication", 
+                   condition=condition, 
+                   age_group=age_group, 
+                   style=communication_style)
+        return builder(condition, age_group, communication_style, patient_context)
+    
+    def _finalize_communication(self, template: CommunicationTemplate, adapted_text: str, reading_time: int,
+                                condition: str, age_group: str, communication_style: str,
+                                patient_context: Optional[Dict[str, Any]]) -> GeneratedCommunication:
+        """Apply per-call reassurance and personalization and assemble the result"""
         # Add reassurance if appropriate
         if communication_style == "reassuring":
             adapted_text = self.add_reassurance(adapted_text, "illness")
@@ -475,14 +654,15 @@ class CommunicationEngine:
         if patient_context:
             adapted_text = self._personalize_text(adapted_text, patient_context)
         
-        # Estimate reading time
-        reading_time = self.estimate_reading_time(adapted_text, template.language_level)
+        # Estimate reading time only if the cached text was changed
+        if communication_style == "reassuring" or patient_context:
+            reading_time = self.estimate_reading_time(adapted_text, template.language_level)
         
         # Create final communication
         communication = GeneratedCommunication(
             template_id=template.template_id,
             title=template.name,
-            main_content=adapted_text.strip(),
+            main_content=adapted_text,
             key_points=template.key_points,
             call_to_action=template.call_to_action,
             warnings=template.warnings,
@@ -491,7 +671,7 @@ class CommunicationEngine:
             estimated_reading_time=reading_time,
             confidence_score=template.confidence_score,
             metadata={
-                "generated_timestamp": datetime.utcnow().isoformat(),
+                "generated_timestamp": _utc_timestamp(),
                 "condition": condition,
                 "age_group": age_group,
                 "style": communication_style,
@@ -508,20 +688,23 @@ class CommunicationEngine:
     
     def _personalize_text(self, text: str, patient_context: Dict[str, Any]) -> str:
         """Personalize text with patient context"""
-        # Replace placeholders with patient-specific information
+        # Replace placeholders with patient-specific information in a single pass;
+        # the child's name takes precedence over an age-based reference
         if "child_name" in patient_context:
-            text = text.replace("your child", patient_context["child_name"])
-            text = text.replace("Your child", patient_context["child_name"])
-        
-        if "age" in patient_context:
-            text = text.replace("your child", f"your {patient_context['age']}-year-old")
+            child_name = patient_context["child_name"]
+            text = _CHILD_REFERENCE_PATTERN.sub(lambda match: child_name, text)
+        elif "age" in patient_context:
+            age = patient_context["age"]
+            text = _CHILD_REFERENCE_PATTERN.sub(lambda match: f"{match.group(1)} {age}-year-old", text)
         
+        parts = [text]
         if "specific_symptoms" in patient_context:
             symptoms = patient_context["specific_symptoms"]
             if symptoms:
-                text += f"\n\nBased on {patient_context.get('child_name', 'your child')}'s symptoms: {', '.join(symptoms)}"
+                parts.append(f"\n\nBased on {patient_context.get('child_name', 'your child')}'s symptoms: ")
+                parts.append(', '.join(symptoms))
         
-        return text
+        return ''.join(parts)
 
 class CommunicationValidator:
     """Validates generated communications for appropriateness and safety"""
@@ -537,6 +720,25 @@ class CommunicationValidator:
             "seek medical attention",
             "emergency room"
         ]
+        
+        self.complex_terms = ["pathophysiology", "etiology", "prognosis", "contraindication"]
+        self.contact_disclaimers = ["contact your healthcare provider", "call your doctor"]
+        self.emergency_disclaimers = ["seek medical attention", "emergency room", "call 911"]
+        
+        # Disclaimer checks only need the first hit, searched case-insensitively in place
+        self._contact_re = re.compile("|".join(map(re.escape, self.contact_disclaimers)), re.IGNORECASE)
+        self._emergency_re = re.compile("|".join(map(re.escape, self.emergency_disclaimers)), re.IGNORECASE)
+        
+        # Term lists share one matcher so each text is scanned once; payloads carry the category
+        self._keyword_matcher = KeywordMatcher(
+            [(term, "inappropriate") for term in self.inappropriate_terms]
+            + [(term, "complex") for term in self.complex_terms]
+        )
+    
+    def _find_terms(self, text: str, category: str) -> Set[str]:
+        """Return the terms of a category contained in the lowercased text"""
+        payloads = self._keyword_matcher.payloads
+        return {term for term in self._keyword_matcher.find(text) if category in payloads[term]}
     
     def validate_language_appropriateness(self, communication: GeneratedCommunication) -> List[str]:
         """Validate language appropriateness for age group"""
@@ -546,9 +748,9 @@ class CommunicationValidator:
         
         # Check for complex medical terms in toddler/preschool communications
         if communication.language_level in [LanguageLevel.TODDLER, LanguageLevel.PRESCHOOL]:
-            complex_terms = ["pathophysiology", "etiology", "prognosis", "contraindication"]
-            for term in complex_terms:
-                if term in text:
+            found_terms = self._find_terms(text, "complex")
+            for term in self.complex_terms:
+                if term in found_terms:
                     warnings.append(f"Complex medical term '{term}' in {communication.language_level.value} communication")
         
         # Check for overly simplistic language in professional communications
@@ -561,11 +763,11 @@ class CommunicationValidator:
     def validate_safety_disclaimers(self, communication: GeneratedCommunication) -> List[str]:
         """Validate that safety disclaimers are present"""
         warnings = []
-        text = communication.main_content.lower() + communication.call_to_action.lower()
+        text = communication.main_content + " " + communication.call_to_action
         
         # Check for required disclaimers
-        has_contact_provider = any(disclaimer in text for disclaimer in ["contact your healthcare provider", "call your doctor"])
-        has_emergency_disclaimer = any(disclaimer in text for disclaimer in ["seek medical attention", "emergency room", "call 911"])
+        has_contact_provider = self._contact_re.search(text) is not None
+        has_emergency_disclaimer = self._emergency_re.search(text) is not None
         
         if not has_contact_provider:
             warnings.append("Missing contact healthcare provider disclaimer")
@@ -579,9 +781,10 @@ class CommunicationValidator:
         """Validate that communication doesn't make inappropriate claims"""
         warnings = []
         text = communication.main_content.lower()
+        found_terms = self._find_terms(text, "inappropriate")
         
         for inappropriate_term in self.inappropriate_terms:
-            if inappropriate_term in text:
+            if inappropriate_term in found_terms:
                 warnings.append(f"Inappropriate claim: '{inappropriate_term}' - may create false expectations")
         
         return warnings
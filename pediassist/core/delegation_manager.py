@@ -2,16 +2,26 @@
 Delegation manager for routing complex cases to appropriate specialists
 """
 
-import json
-import re
-from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass
+import functools
+import itertools
+from array import array
+import sys
+import time
+from typing import Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Any, Tuple, TypeVar
+from dataclasses import dataclass, field
 from enum import Enum
 import structlog
 from datetime import datetime
 
+from .keyword_matcher import KeywordMatcher
+
 logger = structlog.get_logger(__name__)
 
+# Recommendation ids: a process startup prefix plus one counter shared by every manager,
+# so ids stay unique within the process however many managers are created
+_RECOMMENDATION_ID_PREFIX = f"del_{int(time.time())}_"
+_recommendation_id_counter = itertools.count()
+
 class UrgencyLevel(Enum):
     """Case urgency levels"""
     EMERGENCY = "emergency"
@@ -26,6 +36,11 @@ class ComplexityLevel(Enum):
     COMPLEX = "complex"
     HIGHLY_COMPLEX = "highly_complex"
 
+# Urgency levels searched by criteria, highest priority first
+_URGENCY_PRIORITY = (UrgencyLevel.EMERGENCY, UrgencyLevel.URGENT, UrgencyLevel.SEMI_URGENT)
+# Red flags only escalate to these levels; semi-urgent criteria ignore them
+_RED_FLAG_URGENCY_LEVELS = frozenset({UrgencyLevel.EMERGENCY, UrgencyLevel.URGENT})
+
 class SpecialistType(Enum):
     """Types of specialists"""
     PEDIATRICIAN = "pediatrician"
@@ -46,7 +61,7 @@ class SpecialistType(Enum):
     PSYCHOLOGIST = "psychologist"
     SOCIAL_WORKER = "social_worker"
 
-@dataclass
+@dataclass(slots=True)
 class DelegationRule:
     """Delegation rule structure"""
     rule_id: str
@@ -62,8 +77,21 @@ class DelegationRule:
     rationale: str          # Why this delegation is recommended
     confidence_score: float
     is_active: bool
+    age_set: FrozenSet[str] = field(init=False, repr=False)
+    urgency_set: FrozenSet[UrgencyLevel] = field(init=False, repr=False)
+    complexity_set: FrozenSet[ComplexityLevel] = field(init=False, repr=False)
+    conditions_lc: Tuple[str, ...] = field(init=False, repr=False)
+    symptoms_lc: Tuple[str, ...] = field(init=False, repr=False)
+    
+    def __post_init__(self) -> None:
+        # Normalized once per rule so matching never lowercases or converts enums per call
+        self.age_set = frozenset(sys.intern(ag.lower()) for ag in self.age_groups)
+        self.urgency_set = frozenset(UrgencyLevel(level) for level in self.urgency_levels)
+        self.complexity_set = frozenset(ComplexityLevel(level) for level in self.complexity_levels)
+        self.conditions_lc = tuple(sys.intern(condition.lower()) for condition in self.conditions)
+        self.symptoms_lc = tuple(sys.intern(symptom.lower()) for symptom in self.symptoms)
 
-@dataclass
+@dataclass(slots=True)
 class DelegationRecommendation:
     """Delegation recommendation output"""
     recommendation_id: str
@@ -80,14 +108,149 @@ class DelegationRecommendation:
     generated_at: datetime
     metadata: Dict[str, Any]
 
+@dataclass(slots=True)
+class CaseInput:
+    """One case for batch delegation, mirroring generate_delegation_recommendation's arguments"""
+    diagnosis: str
+    symptoms: List[str]
+    age_group: str
+    red_flags: Optional[List[str]] = None
+    comorbidities: Optional[List[str]] = None
+    patient_context: Optional[Dict[str, Any]] = None
+
+def _normalize_terms(values: Iterable[str]) -> Tuple[str, ...]:
+    """Lowercase, intern and sort free-text terms into a hashable cache key"""
+    return tuple(sorted(sys.intern(value.lower()) for value in values))
+
+class _NormalizedCase(NamedTuple):
+    """Case inputs lowercased and interned once, shared by the urgency, complexity and rule lookups"""
+    diagnosis_lc: str
+    symptoms_lc: Tuple[str, ...]
+    red_flags_lc: Tuple[str, ...]
+    age_group: str
+    age_group_lc: str
+    comorbidity_count: int
+
+def _normalize_case(diagnosis: str, symptoms: List[str], age_group: str,
+                    red_flags: Optional[List[str]], comorbidities: Optional[List[str]]) -> _NormalizedCase:
+    """Normalize a case's free text once at the public entry point"""
+    return _NormalizedCase(
+        diagnosis_lc=sys.intern(diagnosis.lower()),
+        symptoms_lc=_normalize_terms(symptoms),
+        red_flags_lc=_normalize_terms(red_flags or ()),
+        age_group=age_group,
+        age_group_lc=sys.intern(age_group.lower()),
+        comorbidity_count=len(comorbidities) if comorbidities else 0,
+    )
+
+_LevelT = TypeVar("_LevelT", bound=Enum)
+
+def _freeze_terms(terms_by_level: Dict[_LevelT, List[str]]) -> Dict[_LevelT, FrozenSet[str]]:
+    """Store each level's terms as a frozenset of lowercased, interned strings"""
+    return {
+        level: frozenset(sys.intern(term.lower()) for term in terms)
+        for level, terms in terms_by_level.items()
+    }
+
+# Static guidance attached to every recommendation, copied per call so callers can still mutate the lists
+_RED_FLAGS_BY_URGENCY: Dict[UrgencyLevel, Tuple[str, ...]] = {
+    UrgencyLevel.EMERGENCY: (
+        "Seek immediate medical attention if condition worsens",
+        "Call 911 for severe symptoms",
+        "Do not delay seeking emergency care"
+    ),
+    UrgencyLevel.URGENT: (
+        "Seek medical attention within 24 hours if symptoms persist",
+        "Monitor for signs of deterioration",
+        "Contact healthcare provider if new symptoms develop"
+    ),
+}
+_RED_FLAGS_DEFAULT = (
+    "Monitor symptoms and seek care if condition worsens",
+    "Follow up as recommended",
+    "Contact healthcare provider with concerns"
+)
+
+_REQUIRED_INFO_BASE = (
+    "Complete medical history",
+    "Current medications",
+    "Previous treatments and responses",
+    "Family history relevant to condition"
+)
+_REQUIRED_INFO_BY_SPECIALIST: Dict[SpecialistType, Tuple[str, ...]] = {
+    specialist: _REQUIRED_INFO_BASE + extra
+    for specialist, extra in (
+        (SpecialistType.CARDIOLOGIST, (
+            "Previous ECGs or cardiac imaging",
+            "Exercise tolerance history",
+            "Family history of cardiac conditions"
+        )),
+        (SpecialistType.NEUROLOGIST, (
+            "Detailed seizure history if applicable",
+            "Developmental milestones",
+            "Previous neurological imaging"
+        )),
+        (SpecialistType.ENDOCRINOLOGIST, (
+            "Growth charts",
+            "Pubertal development history",
+            "Previous hormone levels"
+        )),
+    )
+}
+
+_PREPARATION_EMERGENCY = (
+    "Go to nearest emergency room immediately",
+    "Bring all current medications",
+    "Have someone drive you if possible",
+    "Bring insurance information"
+)
+_PREPARATION_SCHEDULED = (
+    "Schedule appointment as recommended",
+    "Bring all current medications",
+    "Bring insurance card and ID",
+    "Arrive 15 minutes early for paperwork"
+)
+_PREPARATION_BY_SPECIALIST: Dict[SpecialistType, Tuple[str, ...]] = {
+    SpecialistType.CARDIOLOGIST: ("Wear comfortable clothing for possible ECG",),
+    SpecialistType.NEUROLOGIST: ("Bring someone who has observed symptoms if possible",),
+}
+
 class DelegationManager:
     """Advanced case delegation and routing system"""
     
-    def __init__(self):
+    def __init__(self) -> None:
         self.delegation_rules = self._load_delegation_rules()
         self.specialist_capabilities = self._load_specialist_capabilities()
         self.urgency_criteria = self._load_urgency_criteria()
         self.complexity_indicators = self._load_complexity_indicators()
+        self._rule_age_masks, self._rule_urgency_masks, self._rule_complexity_masks = self._build_rule_masks()
+        # Per-rule columns read by the matching kernel instead of rule attributes
+        self._rule_confidence = array("d", (rule.confidence_score for rule in self.delegation_rules))
+        # Keyword matchers scan each case text once for every criterion of a dimension
+        self._urgency_matcher = KeywordMatcher(
+            (criterion, level)
+            for level in _URGENCY_PRIORITY
+            for criterion in self.urgency_criteria[level]
+        )
+        self._complexity_matcher = KeywordMatcher(
+            (indicator, level)
+            for level in (ComplexityLevel.HIGHLY_COMPLEX, ComplexityLevel.COMPLEX, ComplexityLevel.MODERATE)
+            for indicator in self.complexity_indicators[level]
+        )
+        self._rule_condition_matcher = KeywordMatcher(
+            (condition, 1 << index)
+            for index, rule in enumerate(self.delegation_rules)
+            for condition in rule.conditions_lc
+        )
+        self._rule_symptom_matcher = KeywordMatcher(
+            (symptom, 1 << index)
+            for index, rule in enumerate(self.delegation_rules)
+            for symptom in rule.symptoms_lc
+        )
+        # Assessments are pure functions of the normalized case, so repeat presentations hit the cache
+        self._cached_urgency = functools.lru_cache(maxsize=4096)(self._assess_urgency_normalized)
+        self._cached_complexity = functools.lru_cache(maxsize=4096)(self._assess_complexity_normalized)
+        self._cached_rule_indices = functools.lru_cache(maxsize=4096)(self._find_matching_rule_indices)
     
     def _load_delegation_rules(self) -> List[DelegationRule]:
         """Load evidence-based delegation rules"""
@@ -268,9 +431,9 @@ class DelegationManager:
             ]
         }
     
-    def _load_urgency_criteria(self) -> Dict[UrgencyLevel, List[str]]:
+    def _load_urgency_criteria(self) -> Dict[UrgencyLevel, FrozenSet[str]]:
         """Load criteria for determining case urgency"""
-        return {
+        criteria = {
             UrgencyLevel.EMERGENCY: [
                 "life_threatening", "airway_compromise", "severe_respiratory_distress", 
                 "cardiac_arrest", "severe_trauma", "uncontrolled_bleeding", "septic_shock",
@@ -292,10 +455,11 @@ class DelegationManager:
                 "behavioral_concerns", "sleep_issues"
             ]
         }
+        return _freeze_terms(criteria)
     
-    def _load_complexity_indicators(self) -> Dict[ComplexityLevel, List[str]]:
+    def _load_complexity_indicators(self) -> Dict[ComplexityLevel, FrozenSet[str]]:
         """Load indicators for determining case complexity"""
-        return {
+        indicators = {
             ComplexityLevel.SIMPLE: [
                 "single_organ_system", "well_defined_diagnosis", "standard_treatment_protocol",
                 "good_response_to_initial_treatment", "minimal_diagnostic_uncertainty"
@@ -316,62 +480,69 @@ class DelegationManager:
                 "requires_major_surgery", "terminal_condition", "rare_genetic_disorder"
             ]
         }
+        return _freeze_terms(indicators)
     
     def assess_case_urgency(self, diagnosis: str, symptoms: List[str], age_group: str, red_flags: List[str]) -> UrgencyLevel:
         """Assess the urgency level of a case"""
-        # Check for emergency criteria first
-        for emergency_criterion in self.urgency_criteria[UrgencyLevel.EMERGENCY]:
-            if (emergency_criterion in diagnosis.lower() or 
-                any(emergency_criterion in symptom.lower() for symptom in symptoms) or
-                any(emergency_criterion in red_flag.lower() for red_flag in red_flags)):
-                return UrgencyLevel.EMERGENCY
-        
-        # Check for urgent criteria
-        for urgent_criterion in self.urgency_criteria[UrgencyLevel.URGENT]:
-            if (urgent_criterion in diagnosis.lower() or 
-                any(urgent_criterion in symptom.lower() for symptom in symptoms) or
-                any(urgent_criterion in red_flag.lower() for red_flag in red_flags)):
-                return UrgencyLevel.URGENT
-        
-        # Check for semi-urgent criteria
-        for semi_urgent_criterion in self.urgency_criteria[UrgencyLevel.SEMI_URGENT]:
-            if (semi_urgent_criterion in diagnosis.lower() or 
-                any(semi_urgent_criterion in symptom.lower() for symptom in symptoms)):
-                return UrgencyLevel.SEMI_URGENT
+        return self._cached_urgency(sys.intern(diagnosis.lower()), _normalize_terms(symptoms),
+                                    _normalize_terms(red_flags or ()))
+    
+    def _assess_urgency_normalized(self, diagnosis_lc: str, symptoms_lc: Tuple[str, ...],
+                                   red_flags_lc: Tuple[str, ...]) -> UrgencyLevel:
+        """Assess urgency from lowercased inputs"""
+        # Newline-separated so no criterion can span two fields
+        find_levels = self._urgency_matcher.find_payloads
+        matched_levels = find_levels("\n".join([diagnosis_lc, *symptoms_lc]))
+        # Red flags can only raise the level, so skip their scan once the case is already an emergency
+        if red_flags_lc and UrgencyLevel.EMERGENCY not in matched_levels:
+            flag_levels = find_levels("\n".join(red_flags_lc))
+            matched_levels |= flag_levels & _RED_FLAG_URGENCY_LEVELS
+        
+        # Highest-priority level with any matching criterion wins
+        for level in _URGENCY_PRIORITY:
+            if level in matched_levels:
+                return level
         
         # Default to routine
         return UrgencyLevel.ROUTINE
     
     def assess_case_complexity(self, diagnosis: str, symptoms: List[str], age_group: str, 
-                              comorbidities: List[str] = None) -> ComplexityLevel:
+                              comorbidities: Optional[List[str]] = None) -> ComplexityLevel:
         """Assess the complexity level of a case"""
+        return self._cached_complexity(sys.intern(diagnosis.lower()), _normalize_terms(symptoms),
+                                       age_group, len(comorbidities) if comorbidities else 0)
+    
+    def _assess_complexity_normalized(self, diagnosis_lc: str, symptoms_lc: Tuple[str, ...], age_group: str,
+                                      comorbidity_count: int) -> ComplexityLevel:
+        """Assess complexity from lowercased inputs; only the number of comorbidities matters"""
         complexity_score = 0
         
+        matcher = self._complexity_matcher
+        payloads = matcher.payloads
+        matched_levels = [
+            level
+            for indicator in matcher.find("\n".join([diagnosis_lc, *symptoms_lc]))
+            for level in payloads[indicator]
+        ]
+        
         # Check for highly complex indicators
-        for complex_indicator in self.complexity_indicators[ComplexityLevel.HIGHLY_COMPLEX]:
-            if (complex_indicator in diagnosis.lower() or 
-                any(complex_indicator in symptom.lower() for symptom in symptoms)):
-                return ComplexityLevel.HIGHLY_COMPLEX
-        
-        # Check for complex indicators
-        for complex_indicator in self.complexity_indicators[ComplexityLevel.COMPLEX]:
-            if (complex_indicator in diagnosis.lower() or 
-                any(complex_indicator in symptom.lower() for symptom in symptoms)):
-                complexity_score += 3
-        
-        # Check for moderate complexity indicators
-        for moderate_indicator in self.complexity_indicators[ComplexityLevel.MODERATE]:
-            if (moderate_indicator in diagnosis.lower() or 
-                any(moderate_indicator in symptom.lower() for symptom in symptoms)):
-                complexity_score += 2
+        if ComplexityLevel.HIGHLY_COMPLEX in matched_levels:
+            return ComplexityLevel.HIGHLY_COMPLEX
+        
+        # Each complex indicator scores 3; the score only grows from here, so stop once it is complex
+        complexity_score += 3 * matched_levels.count(ComplexityLevel.COMPLEX)
+        if complexity_score >= 5:
+            return ComplexityLevel.COMPLEX
+        
+        # Each moderate indicator scores 2
+        complexity_score += 2 * matched_levels.count(ComplexityLevel.MODERATE)
         
         # Age-related complexity (neonates and complex adolescents)
         if age_group == "newborn":
             complexity_score += 2
         
         # Comorbidities add complexity
-        if comorbidities:
-            complexity_score += len(comorbidities)
+        complexity_score += comorbidity_count
         
         # Determine complexity level based on score
         if complexity_score >= 5:
@@ -381,73 +552,118 @@ class DelegationManager:
         else:
             return ComplexityLevel.SIMPLE
     
-    def find_matching_rules(self, diagnosis: str, symptoms: List[str], age_group: str, 
-                          urgency_level: UrgencyLevel, complexity_level: ComplexityLevel) -> List[DelegationRule]:
-        """Find matching delegation rules"""
-        matching_rules = []
+    def _build_rule_masks(self) -> Tuple[Dict[str, int], Dict[UrgencyLevel, int], Dict[ComplexityLevel, int]]:
+        """Encode active rules as integer bitmasks (bit i = rule i) per age group, urgency and complexity"""
+        age_masks: Dict[str, int] = {}
+        urgency_masks: Dict[UrgencyLevel, int] = {}
+        complexity_masks: Dict[ComplexityLevel, int] = {}
         
-        for rule in self.delegation_rules:
+        for index, rule in enumerate(self.delegation_rules):
             if not rule.is_active:
                 continue
-            
-            # Check age group match
-            if age_group.lower() not in [ag.lower() for ag in rule.age_groups]:
-                continue
-            
-            # Check urgency level match
-            if urgency_level.value not in rule.urgency_levels:
-                continue
-            
-            # Check complexity level match
-            if complexity_level.value not in rule.complexity_levels:
-                continue
-            
-            # Check condition match
-            condition_match = False
-            for condition in rule.conditions:
-                if condition.lower() in diagnosis.lower():
-                    condition_match = True
-                    break
-            
-            # Check symptom match
-            symptom_match = False
-            for rule_symptom in rule.symptoms:
-                for patient_symptom in symptoms:
-                    if rule_symptom.lower() in patient_symptom.lower():
-                        symptom_match = True
-                        break
-                if symptom_match:
-                    break
-            
-            # Match if either condition or symptoms match
-            if condition_match or symptom_match:
-                matching_rules.append(rule)
-        
-        return matching_rules
+            bit = 1 << index
+            for age_group in rule.age_set:
+                age_masks[age_group] = age_masks.get(age_group, 0) | bit
+            for urgency in rule.urgency_set:
+                urgency_masks[urgency] = urgency_masks.get(urgency, 0) | bit
+            for complexity in rule.complexity_set:
+                complexity_masks[complexity] = complexity_masks.get(complexity, 0) | bit
+        
+        return age_masks, urgency_masks, complexity_masks
+    
+    def find_matching_rules(self, diagnosis: str, symptoms: List[str], age_group: str, 
+                          urgency_level: UrgencyLevel, complexity_level: ComplexityLevel) -> List[DelegationRule]:
+        """Find matching delegation rules"""
+        matching_indices = self._cached_rule_indices(sys.intern(diagnosis.lower()), _normalize_terms(symptoms),
+                                                     sys.intern(age_group.lower()), urgency_level, complexity_level)
+        return [self.delegation_rules[index] for index in matching_indices]
+    
+    def _find_matching_rule_indices(self, diagnosis_lc: str, symptoms_lc: Tuple[str, ...], age_group_lc: str,
+                                    urgency_level: UrgencyLevel,
+                                    complexity_level: ComplexityLevel) -> Tuple[int, ...]:
+        """Find positions of matching rules from lowercased inputs"""
+        # Only active rules applicable to this age, urgency and complexity are candidates
+        candidates = (self._rule_age_masks.get(age_group_lc, 0)
+                      & self._rule_urgency_masks.get(urgency_level, 0)
+                      & self._rule_complexity_masks.get(complexity_level, 0))
+        if not candidates:
+            return ()
+        
+        # A rule matches if any of its conditions is in the diagnosis or any of its symptoms
+        # is in one patient symptom (newline-separated so no rule symptom spans two)
+        hits = 0
+        for bit in self._rule_condition_matcher.find_payloads(diagnosis_lc):
+            hits |= bit
+        if symptoms_lc:
+            for bit in self._rule_symptom_matcher.find_payloads("\n".join(symptoms_lc)):
+                hits |= bit
+        matched = candidates & hits
+        
+        # Visit matched bits from the lowest rule index up to keep rule order
+        matching_indices = []
+        while matched:
+            bit = matched & -matched
+            matched ^= bit
+            matching_indices.append(bit.bit_length() - 1)
+        
+        return tuple(matching_indices)
     
     def generate_delegation_recommendation(self, diagnosis: str, symptoms: List[str], age_group: str,
-                                         red_flags: List[str] = None, comorbidities: List[str] = None,
-                                         patient_context: Dict[str, Any] = None) -> DelegationRecommendation:
+                                         red_flags: Optional[List[str]] = None, comorbidities: Optional[List[str]] = None,
+                                         patient_context: Optional[Dict[str, Any]] = None) -> DelegationRecommendation:
         """Generate delegation recommendation"""
         logger.info("Generating delegation recommendation", 
                    diagnosis=diagnosis, 
                    age_group=age_group,
                    symptoms_count=len(symptoms))
         
+        recommendation = self._build_recommendation(diagnosis, symptoms, age_group, red_flags, comorbidities,
+                                                    patient_context, datetime.utcnow())
+        
+        logger.info("Delegation recommendation generated successfully",
+                   primary_specialist=recommendation.primary_specialist.value,
+                   urgency_level=recommendation.urgency_level.value,
+                   confidence_score=recommendation.confidence_score)
+        
+        return recommendation
+    
+    def generate_delegation_recommendations(self, cases: List[CaseInput]) -> List[DelegationRecommendation]:
+        """Generate recommendations for a queue of cases, logging once per batch"""
+        logger.info("Generating delegation recommendations", count=len(cases))
+        
+        generated_at = datetime.utcnow()
+        build = self._build_recommendation
+        recommendations = [
+            build(case.diagnosis, case.symptoms, case.age_group, case.red_flags, case.comorbidities,
+                  case.patient_context, generated_at)
+            for case in cases
+        ]
+        
+        logger.info("Delegation recommendations generated successfully", count=len(recommendations))
+        
+        return recommendations
+    
+    def _build_recommendation(self, diagnosis: str, symptoms: List[str], age_group: str,
+                              red_flags: Optional[List[str]], comorbidities: Optional[List[str]],
+                              patient_context: Optional[Dict[str, Any]], generated_at: datetime) -> DelegationRecommendation:
+        """Assess and route one case without logging"""
         # Set defaults
         red_flags = red_flags or []
         comorbidities = comorbidities or []
         
-        # Assess case characteristics
-        urgency_level = self.assess_case_urgency(diagnosis, symptoms, age_group, red_flags)
-        complexity_level = self.assess_case_complexity(diagnosis, symptoms, age_group, comorbidities)
+        # Assess case characteristics from inputs normalized once
+        case = _normalize_case(diagnosis, symptoms, age_group, red_flags, comorbidities)
+        urgency_level = self._cached_urgency(case.diagnosis_lc, case.symptoms_lc, case.red_flags_lc)
+        complexity_level = self._cached_complexity(case.diagnosis_lc, case.symptoms_lc, case.age_group,
+                                                   case.comorbidity_count)
         
         # Find matching rules
-        matching_rules = self.find_matching_rules(diagnosis, symptoms, age_group, urgency_level, complexity_level)
+        matching_indices = self._cached_rule_indices(case.diagnosis_lc, case.symptoms_lc, case.age_group_lc,
+                                                     urgency_level, complexity_level)
         
-        if matching_rules:
-            # Use the highest confidence matching rule
-            best_rule = max(matching_rules, key=lambda r: r.confidence_score)
+        if matching_indices:
+            # Use the highest confidence matching rule (first one on ties), read from the confidence column
+            best_rule = self.delegation_rules[max(matching_indices, key=self._rule_confidence.__getitem__)]
             primary_specialist = best_rule.specialist_types[0]
             secondary_specialists = best_rule.specialist_types[1:] if len(best_rule.specialist_types) > 1 else []
             time_frame = best_rule.time_frame
@@ -476,8 +692,8 @@ class DelegationManager:
         # Create case summary
         case_summary = self._generate_case_summary(diagnosis, symptoms, age_group, urgency_level, complexity_level)
         
-        recommendation = DelegationRecommendation(
-            recommendation_id=f"del_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}",
+        return DelegationRecommendation(
+            recommendation_id=f"{_RECOMMENDATION_ID_PREFIX}{next(_recommendation_id_counter)}",
             case_summary=case_summary,
             primary_specialist=primary_specialist,
             secondary_specialists=secondary_specialists,
@@ -488,107 +704,30 @@ class DelegationManager:
             required_information=required_info,
             preparation_instructions=preparation_instructions,
             confidence_score=confidence_score,
-            generated_at=datetime.utcnow(),
+            generated_at=generated_at,
             metadata={
                 "diagnosis": diagnosis,
                 "symptoms": symptoms,
                 "age_group": age_group,
                 "red_flags": red_flags,
                 "comorbidities": comorbidities,
-                "matching_rules_count": len(matching_rules),
+                "matching_rules_count": len(matching_indices),
                 "patient_context": patient_context or {}
             }
         )
-        
-        logger.info("Delegation recommendation generated successfully",
-                   primary_specialist=primary_specialist.value,
-                   urgency_level=urgency_level.value,
-                   confidence_score=confidence_score)
-        
-        return recommendation
     
     def _generate_red_flags(self, urgency_level: UrgencyLevel) -> List[str]:
         """Generate red flags for the recommendation"""
-        red_flags = []
-        
-        if urgency_level == UrgencyLevel.EMERGENCY:
-            red_flags.extend([
-                "Seek immediate medical attention if condition worsens",
-                "Call 911 for severe symptoms",
-                "Do not delay seeking emergency care"
-            ])
-        elif urgency_level == UrgencyLevel.URGENT:
-            red_flags.extend([
-                "Seek medical attention within 24 hours if symptoms persist",
-                "Monitor for signs of deterioration",
-                "Contact healthcare provider if new symptoms develop"
-            ])
-        else:
-            red_flags.extend([
-                "Monitor symptoms and seek care if condition worsens",
-                "Follow up as recommended",
-                "Contact healthcare provider with concerns"
-            ])
-        
-        return red_flags
+        return list(_RED_FLAGS_BY_URGENCY.get(urgency_level, _RED_FLAGS_DEFAULT))
     
     def _generate_required_information(self, specialist: SpecialistType, diagnosis: str) -> List[str]:
         """Generate required information for specialist consultation"""
-        required_info = [
-            "Complete medical history",
-            "Current medications",
-            "Previous treatments and responses",
-            "Family history relevant to condition"
-        ]
-        
-        # Specialist-specific requirements
-        if specialist == SpecialistType.CARDIOLOGIST:
-            required_info.extend([
-                "Previous ECGs or cardiac imaging",
-                "Exercise tolerance history",
-                "Family history of cardiac conditions"
-            ])
-        elif specialist == SpecialistType.NEUROLOGIST:
-            required_info.extend([
-                "Detailed seizure history if applicable",
-                "Developmental milestones",
-                "Previous neurological imaging"
-            ])
-        elif specialist == SpecialistType.ENDOCRINOLOGIST:
-            required_info.extend([
-                "Growth charts",
-                "Pubertal development history",
-                "Previous hormone levels"
-            ])
-        
-        return required_info
+        return list(_REQUIRED_INFO_BY_SPECIALIST.get(specialist, _REQUIRED_INFO_BASE))
     
     def _generate_preparation_instructions(self, specialist: SpecialistType, urgency_level: UrgencyLevel) -> List[str]:
         """Generate preparation instructions for specialist visit"""
-        instructions = []
-        
-        if urgency_level == UrgencyLevel.EMERGENCY:
-            instructions.extend([
-                "Go to nearest emergency room immediately",
-                "Bring all current medications",
-                "Have someone drive you if possible",
-                "Bring insurance information"
-            ])
-        else:
-            instructions.extend([
-                "Schedule appointment as recommended",
-                "Bring all current medications",
-                "Bring insurance card and ID",
-                "Arrive 15 minutes early for paperwork"
-            ])
-        
-        # Specialist-specific preparation
-        if specialist == SpecialistType.CARDIOLOGIST:
-            instructions.append("Wear comfortable clothing for possible ECG")
-        elif specialist == SpecialistType.NEUROLOGIST:
-            instructions.append("Bring someone who has observed symptoms if possible")
-        
-        return instructions
+        base = _PREPARATION_EMERGENCY if urgency_level == UrgencyLevel.EMERGENCY else _PREPARATION_SCHEDULED
+        return [*base, *_PREPARATION_BY_SPECIALIST.get(specialist, ())]
     
     def _generate_case_summary(self, diagnosis: str, symptoms: List[str], age_group: str,
                              urgency_level: UrgencyLevel, complexity_level: ComplexityLevel) -> str:
@@ -602,10 +741,24 @@ class DelegationManager:
         
         return "; ".join(summary_parts)
 
+# Time frames acceptable for each urgency level
+_ALLOWED_TIME_FRAMES: Dict[UrgencyLevel, FrozenSet[str]] = {
+    UrgencyLevel.EMERGENCY: frozenset({"immediately"}),
+    UrgencyLevel.URGENT: frozenset({"immediately", "within_2_hours", "within_24_hours"}),
+    UrgencyLevel.SEMI_URGENT: frozenset({"within_24_hours", "within_48_hours"}),
+    UrgencyLevel.ROUTINE: frozenset({"within_1_week", "within_2_weeks"})
+}
+
+# Specialists able to take an emergency case
+_EMERGENCY_SPECIALISTS = frozenset({SpecialistType.EMERGENCY_PHYSICIAN, SpecialistType.INTENSIVIST})
+
+# Specialists not appropriate for pediatric patients (none yet)
+_PEDIATRIC_INAPPROPRIATE_SPECIALISTS: FrozenSet[SpecialistType] = frozenset()
+
 class DelegationValidator:
     """Validates delegation recommendations for safety and appropriateness"""
     
-    def __init__(self):
+    def __init__(self) -> None:
         self.emergency_conditions = [
             "cardiac arrest", "respiratory failure", "septic shock", "anaphylaxis",
             "severe trauma", "status epilepticus", "coma"
@@ -619,44 +772,46 @@ class DelegationValidator:
             "within_1_week": 168,
             "within_2_weeks": 336
         }
-    
-    def validate_emergency_routing(self, recommendation: DelegationRecommendation) -> List[str]:
-        """Validate that emergencies are properly routed"""
-        warnings = []
         
-        # Check if emergency cases are routed to appropriate specialists
-        if recommendation.urgency_level == UrgencyLevel.EMERGENCY:
-            emergency_specialists = [SpecialistType.EMERGENCY_PHYSICIAN, SpecialistType.INTENSIVIST]
-            
-            if recommendation.primary_specialist not in emergency_specialists:
-                # Check if any secondary specialists are emergency-appropriate
-                has_emergency_specialist = any(spec in emergency_specialists for spec in recommendation.secondary_specialists)
-                
-                if not has_emergency_specialist:
-                    warnings.append("Emergency case not routed to emergency-appropriate specialist")
-            
+        # validate() dispatches once on urgency to a check specialized for that level
+        self._urgency_checks: Dict[UrgencyLevel, Callable[[DelegationRecommendation], Tuple[List[str], List[str]]]] = {
+            level: self._make_urgency_check(level) for level in UrgencyLevel
+        }
+    
+    @staticmethod
+    def _make_urgency_check(urgency_level: UrgencyLevel) -> Callable[[DelegationRecommendation], Tuple[List[str], List[str]]]:
+        """Build the emergency-routing and time-frame checks for one urgency level"""
+        allowed_timeframes = _ALLOWED_TIME_FRAMES.get(urgency_level, frozenset())
+        level_value = urgency_level.value
+        
+        def check_time_frame(recommendation: DelegationRecommendation) -> List[str]:
+            if recommendation.time_frame in allowed_timeframes:
+                return []
+            return [f"Time frame '{recommendation.time_frame}' not appropriate for {level_value} urgency"]
+        
+        if urgency_level != UrgencyLevel.EMERGENCY:
+            return lambda recommendation: ([], check_time_frame(recommendation))
+        
+        def check_emergency(recommendation: DelegationRecommendation) -> Tuple[List[str], List[str]]:
+            warnings = []
+            if (recommendation.primary_specialist not in _EMERGENCY_SPECIALISTS
+                    and _EMERGENCY_SPECIALISTS.isdisjoint(recommendation.secondary_specialists)):
+                warnings.append("Emergency case not routed to emergency-appropriate specialist")
             if recommendation.time_frame != "immediately":
                 warnings.append("Emergency case should have immediate time frame")
+            return warnings, check_time_frame(recommendation)
         
-        return warnings
+        return check_emergency
+    
+    def validate_emergency_routing(self, recommendation: DelegationRecommendation) -> List[str]:
+        """Validate that emergencies are properly routed"""
+        emergency_warnings, _ = self._urgency_checks[recommendation.urgency_level](recommendation)
+        return emergency_warnings
     
     def validate_time_frame_appropriateness(self, recommendation: DelegationRecommendation) -> List[str]:
         """Validate that time frames are appropriate for urgency levels"""
-        warnings = []
-        
-        urgency_time_requirements = {
-            UrgencyLevel.EMERGENCY: ["immediately"],
-            UrgencyLevel.URGENT: ["immediately", "within_2_hours", "within_24_hours"],
-            UrgencyLevel.SEMI_URGENT: ["within_24_hours", "within_48_hours"],
-            UrgencyLevel.ROUTINE: ["within_1_week", "within_2_weeks"]
-        }
-        
-        allowed_timeframes = urgency_time_requirements.get(recommendation.urgency_level, [])
-        
-        if recommendation.time_frame not in allowed_timeframes:
-            warnings.append(f"Time frame '{recommendation.time_frame}' not appropriate for {recommendation.urgency_level.value} urgency")
-        
-        return warnings
+        _, timeframe_warnings = self._urgency_checks[recommendation.urgency_level](recommendation)
+        return timeframe_warnings
     
     def validate_specialist_availability(self, recommendation: DelegationRecommendation) -> List[str]:
         """Validate that recommended specialists are available for the condition"""
@@ -664,11 +819,7 @@ class DelegationValidator:
         
         # This would ideally check actual specialist availability
         # For now, we'll check if the specialist type is appropriate for pediatric cases
-        pediatric_inappropriate = [
-            # This would be populated with specialists not appropriate for pediatric patients
-        ]
-        
-        if recommendation.primary_specialist in pediatric_inappropriate:
+        if recommendation.primary_specialist in _PEDIATRIC_INAPPROPRIATE_SPECIALISTS:
             warnings.append(f"Specialist {recommendation.primary_specialist.value} may not be appropriate for pediatric patients")
         
         return warnings
@@ -682,12 +833,9 @@ class DelegationValidator:
             "recommendations": []
         }
         
-        # Emergency routing validation
-        emergency_warnings = self.validate_emergency_routing(recommendation)
+        # Emergency routing and time frame validation, specialized for the urgency level
+        emergency_warnings, timeframe_warnings = self._urgency_checks[recommendation.urgency_level](recommendation)
         validation_result["warnings"].extend(emergency_warnings)
-        
-        # Time frame validation
-        timeframe_warnings = self.validate_time_frame_appropriateness(recommendation)
         validation_result["warnings"].extend(timeframe_warnings)
         
         # Specialist availability validation
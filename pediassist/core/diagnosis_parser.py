@@ -2,14 +2,19 @@
 Core diagnosis parsing and analysis engine
 """
 
+import functools
 import re
 import json
-from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass
+from operator import itemgetter
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Pattern, Any, Tuple
+from dataclasses import dataclass, replace
 from enum import Enum
 import structlog
 from datetime import datetime
 
+from .keyword_matcher import KeywordMatcher
+
 logger = structlog.get_logger(__name__)
 
 class AgeGroup(Enum):
@@ -28,7 +33,11 @@ class UrgencyLevel(Enum):
     ROUTINE = "routine"
     WELLNESS = "wellness"
 
-@dataclass
+# Enum values resolved once for the per-parse log lines
+_AGE_GROUP_VALUES: Dict[AgeGroup, str] = {age_group: age_group.value for age_group in AgeGroup}
+_URGENCY_VALUES: Dict[UrgencyLevel, str] = {level: level.value for level in UrgencyLevel}
+
+@dataclass(slots=True)
 class ParsedDiagnosis:
     """Structured diagnosis information"""
     primary_diagnosis: str
@@ -43,11 +52,84 @@ class ParsedDiagnosis:
     icd_codes: List[str]
     metadata: Dict[str, Any]
 
+# Whitespace within a line; headers and their values never span a line break
+_HS = r"[^\S\r\n]*"
+
+# Diagnosis text headers, matched at the start of any line (lines break at \n or \r)
+_DIAGNOSIS_HEADER_PATTERN = re.compile(
+    rf"(?:^|(?<=[\r\n])){_HS}"
+    rf"(?:(?P<primary>primary{_HS}diagnosis|main{_HS}diagnosis|diagnosis)"
+    rf"|(?P<secondary>secondary|additional)"
+    rf"|(?P<differential>differential|consider))"
+    rf":?{_HS}(?P<value>[^\r\n]*)",
+    re.IGNORECASE
+)
+
+# Every diagnosis header contains one of these words, so text without them has no headers
+_DIAGNOSIS_HEADER_WORDS = ("diagnosis", "secondary", "additional", "differential", "consider")
+
+_ICD_CODE_PATTERN = re.compile(r'\b([A-Z]\d{2}(?:\.\d{1,2})?)\b')
+
+# Vague wording lowers confidence; all terms are found in one scan
+_VAGUE_TERMS = frozenset({"maybe", "possibly", "unclear", "unknown", "non-specific"})
+_VAGUE_TERM_MATCHER = KeywordMatcher((term, term) for term in _VAGUE_TERMS)
+
+# Urgency levels that are expected to come with red flags
+_HIGH_URGENCY_LEVELS = frozenset({UrgencyLevel.EMERGENCY, UrgencyLevel.URGENT})
+
+def _count_vague_terms(query_lower: str) -> int:
+    """Count the distinct vague terms present in a lowercased query"""
+    return len(_VAGUE_TERM_MATCHER.find(query_lower))
+
+def _score_confidence(age_specific: bool, has_symptoms: bool, system_identified: bool, vague_count: int) -> float:
+    """Score diagnosis confidence from features extracted by the parser"""
+    score = 0.5  # Base score
+    
+    # Increase score for specific age mentions
+    if age_specific:
+        score += 0.1
+    
+    # Increase score for specific symptoms mentioned
+    if has_symptoms:
+        score += 0.2
+    
+    # Increase score for system category identification
+    if system_identified:
+        score += 0.1
+    
+    # Decrease score for vague terms, one step per term as before
+    for _ in range(vague_count):
+        score -= 0.1
+    
+    # Ensure score is between 0 and 1
+    return max(0.0, min(1.0, score))
+
 class DiagnosisParser:
     """Advanced diagnosis parsing engine"""
     
     def __init__(self):
-        self.age_patterns = {
+        # Compiled patterns and matchers are built once per process and shared read-only by every parser
+        self.age_patterns = self._load_age_patterns()
+        self.urgency_patterns = self._load_urgency_patterns()
+        self.system_categories = self._load_system_categories()
+        self.red_flag_patterns = self._load_red_flag_patterns()
+        self.symptom_patterns = self._load_symptom_patterns()
+        self._urgency_combined = self._build_urgency_combined()
+        self._system_matcher = self._build_system_matcher()
+        self._red_flag_combined = self._build_red_flag_combined()
+        
+        # Parsing is deterministic in (query, diagnosis_text), so repeat queries reuse the result
+        self._cached_parse = functools.lru_cache(maxsize=1024)(self._parse_uncached)
+        # The classifiers depend on the query alone, so they also hit when only diagnosis_text differs
+        self._cached_age_group = functools.lru_cache(maxsize=256)(self._parse_age_group_lower)
+        self._cached_urgency_level = functools.lru_cache(maxsize=256)(self._parse_urgency_level_lower)
+        self._cached_system_category = functools.lru_cache(maxsize=256)(self._extract_system_category_lower)
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _load_age_patterns() -> Mapping[AgeGroup, Pattern[str]]:
+        """Load compiled age group patterns, checked in order"""
+        age_patterns = {
             AgeGroup.NEWBORN: r"\b(newborn|neonate|0\s*-\s*28\s*days?)\b",
             AgeGroup.INFANT: r"\b(infant|1\s*-\s*12\s*months?|baby)\b",
             AgeGroup.TODDLER: r"\b(toddler|1\s*-\s*3\s*years?|young\s*child)\b",
@@ -55,8 +137,16 @@ class DiagnosisParser:
             AgeGroup.SCHOOL_AGE: r"\b(school\s*age|6\s*-\s*12\s*years?|child)\b",
             AgeGroup.ADOLESCENT: r"\b(adolescent|teen|13\s*-\s*18\s*years?|adolescent)\b"
         }
-        
-        self.urgency_patterns = {
+        return MappingProxyType({
+            age_group: re.compile(pattern, re.IGNORECASE)
+            for age_group, pattern in age_patterns.items()
+        })
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _load_urgency_patterns() -> Mapping[UrgencyLevel, Tuple[Pattern[str], ...]]:
+        """Load compiled urgency patterns per level"""
+        urgency_patterns = {
             UrgencyLevel.EMERGENCY: [
                 r"\b(emergency|urgent|immediate|life\s*threatening|critical|severe)\b",
                 r"\b(sepsis|meningitis|anaphylaxis|cardiac\s*arrest|respiratory\s*failure)\b"
@@ -74,21 +164,33 @@ class DiagnosisParser:
                 r"\b(check\s*up|immunization|growth\s*monitoring)\b"
             ]
         }
-        
-        self.system_categories = {
-            "cardiovascular": ["heart", "cardiac", "circulation", "blood pressure", "pulse"],
-            "respiratory": ["lung", "breathing", "respiratory", "cough", "wheeze", "asthma"],
-            "neurological": ["brain", "neurological", "seizure", "headache", "consciousness"],
-            "gastrointestinal": ["stomach", "abdominal", "bowel", "diarrhea", "vomiting"],
-            "infectious": ["infection", "fever", "bacterial", "viral", "antibiotic"],
-            "dermatological": ["skin", "rash", "eczema", "dermatitis", "lesion"],
-            "musculoskeletal": ["bone", "muscle", "joint", "fracture", "pain", "mobility"],
-            "endocrine": ["hormone", "diabetes", "thyroid", "growth", "puberty"],
-            "hematological": ["blood", "anemia", "bleeding", "clotting", "platelet"],
-            "renal": ["kidney", "urinary", "renal", "urine", "nephrology"]
-        }
-        
-        self.red_flag_patterns = [
+        return MappingProxyType({
+            level: tuple(re.compile(pattern, re.IGNORECASE) for pattern in patterns)
+            for level, patterns in urgency_patterns.items()
+        })
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _load_system_categories() -> Mapping[str, Tuple[str, ...]]:
+        """Load body system keywords, in tie-break order"""
+        return MappingProxyType({
+            "cardiovascular": ("heart", "cardiac", "circulation", "blood pressure", "pulse"),
+            "respiratory": ("lung", "breathing", "respiratory", "cough", "wheeze", "asthma"),
+            "neurological": ("brain", "neurological", "seizure", "headache", "consciousness"),
+            "gastrointestinal": ("stomach", "abdominal", "bowel", "diarrhea", "vomiting"),
+            "infectious": ("infection", "fever", "bacterial", "viral", "antibiotic"),
+            "dermatological": ("skin", "rash", "eczema", "dermatitis", "lesion"),
+            "musculoskeletal": ("bone", "muscle", "joint", "fracture", "pain", "mobility"),
+            "endocrine": ("hormone", "diabetes", "thyroid", "growth", "puberty"),
+            "hematological": ("blood", "anemia", "bleeding", "clotting", "platelet"),
+            "renal": ("kidney", "urinary", "renal", "urine", "nephrology")
+        })
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _load_red_flag_patterns() -> Tuple[Pattern[str], ...]:
+        """Load compiled red flag patterns"""
+        red_flag_patterns = [
             r"\b(fever\s*in\s*infant|temperature\s*>\s*38\s*°C\s*in\s*<\s*3\s*months?)\b",
             r"\b(seizure|convulsion|loss\s*of\s*consciousness)\b",
             r"\b(difficulty\s*breathing|respiratory\s*distress|cyanosis)\b",
@@ -98,13 +200,70 @@ class DiagnosisParser:
             r"\b(rapid\s*heart\s*rate|tachycardia|bradycardia)\b",
             r"\b(signs\s*of\s*shock|hypotension|poor\s*perfusion)\b"
         ]
+        return tuple(re.compile(pattern, re.IGNORECASE) for pattern in red_flag_patterns)
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _load_symptom_patterns() -> Tuple[Pattern[str], ...]:
+        """Load compiled common symptom patterns"""
+        symptom_patterns = [
+            r"\b(fever|temperature|pyrexia)\b",
+            r"\b(cough|wheeze|breathing\s*difficulty)\b",
+            r"\b(vomiting|nausea|diarrhea|constipation)\b",
+            r"\b(rash|skin\s*changes|lesion)\b",
+            r"\b(headache|pain|ache|discomfort)\b",
+            r"\b(fatigue|lethargy|weakness)\b",
+            r"\b(loss\s*of\s*appetite|poor\s*feeding)\b",
+            r"\b(irritability|fussiness|behavior\s*changes)\b"
+        ]
+        return tuple(re.compile(pattern, re.IGNORECASE) for pattern in symptom_patterns)
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _build_urgency_combined() -> Pattern[str]:
+        """Combine emergency and urgent patterns into one prioritized search"""
+        # Each level is a lookahead from the start of the text, tried in priority order, so an
+        # emergency term anywhere beats an earlier urgent term. Routine is the default whether or
+        # not its patterns match, so only emergency and urgent need scanning.
+        urgency_patterns = DiagnosisParser._load_urgency_patterns()
+        return re.compile(
+            r"\A(?:" + "|".join(
+                f"(?=.*?(?P<{level.name}>{'|'.join(f'(?:{pattern.pattern})' for pattern in urgency_patterns[level])}))"
+                for level in (UrgencyLevel.EMERGENCY, UrgencyLevel.URGENT)
+            ) + ")",
+            re.IGNORECASE | re.DOTALL
+        )
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _build_system_matcher() -> KeywordMatcher:
+        """Build a matcher that finds every system keyword in one scan"""
+        return KeywordMatcher(
+            (keyword, system)
+            for system, keywords in DiagnosisParser._load_system_categories().items()
+            for keyword in keywords
+        )
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _build_red_flag_combined() -> Pattern[str]:
+        """Combine all red flag patterns into one scan"""
+        # Each pattern is wrapped in a group whose number grows with its position, so the match's
+        # lastindex orders results by pattern. The patterns share no words, so their matches never
+        # overlap and one scan finds exactly what a findall per pattern would.
+        return re.compile(
+            "|".join(f"({pattern.pattern})" for pattern in DiagnosisParser._load_red_flag_patterns()),
+            re.IGNORECASE
+        )
     
     def parse_age_group(self, query: str) -> AgeGroup:
         """Extract age group from query"""
-        query_lower = query.lower()
-        
+        return self._cached_age_group(query.lower())
+    
+    def _parse_age_group_lower(self, query_lower: str) -> AgeGroup:
+        """Extract age group from an already-lowercased query"""
         for age_group, pattern in self.age_patterns.items():
-            if re.search(pattern, query_lower, re.IGNORECASE):
+            if pattern.search(query_lower):
                 return age_group
         
         # Default to school age if not specified
@@ -112,74 +271,62 @@ class DiagnosisParser:
     
     def parse_urgency_level(self, query: str) -> UrgencyLevel:
         """Extract urgency level from query"""
-        query_lower = query.lower()
-        
-        # Check emergency patterns first (highest priority)
-        for pattern in self.urgency_patterns[UrgencyLevel.EMERGENCY]:
-            if re.search(pattern, query_lower, re.IGNORECASE):
-                return UrgencyLevel.EMERGENCY
-        
-        # Check urgent patterns
-        for pattern in self.urgency_patterns[UrgencyLevel.URGENT]:
-            if re.search(pattern, query_lower, re.IGNORECASE):
-                return UrgencyLevel.URGENT
-        
-        # Check routine patterns
-        for pattern in self.urgency_patterns[UrgencyLevel.ROUTINE]:
-            if re.search(pattern, query_lower, re.IGNORECASE):
-                return UrgencyLevel.ROUTINE
+        return self._cached_urgency_level(query.lower())
+    
+    def _parse_urgency_level_lower(self, query_lower: str) -> UrgencyLevel:
+        """Extract urgency level from an already-lowercased query"""
+        match = self._urgency_combined.search(query_lower)
+        if match:
+            return UrgencyLevel[match.lastgroup]
         
         # Default to routine
         return UrgencyLevel.ROUTINE
     
     def extract_system_category(self, query: str) -> str:
         """Extract primary body system category"""
-        query_lower = query.lower()
-        system_scores = {}
-        
-        for system, keywords in self.system_categories.items():
-            score = 0
-            for keyword in keywords:
-                if keyword in query_lower:
-                    score += 1
-            if score > 0:
-                system_scores[system] = score
-        
+        return self._cached_system_category(query.lower())
+    
+    def _extract_system_category_lower(self, query_lower: str) -> str:
+        """Extract primary body system category from an already-lowercased query"""
+        payloads = self._system_matcher.payloads
+        system_scores: Dict[str, int] = {}
+        
+        # Each distinct keyword found scores one point for the systems it belongs to
+        for keyword in self._system_matcher.find(query_lower):
+            for system in payloads[keyword]:
+                system_scores[system] = system_scores.get(system, 0) + 1
+        
+        # Track the best system inline; ties go to the system listed first in system_categories
+        best_system, best_score = "general", 0
         if system_scores:
-            return max(system_scores.items(), key=lambda x: x[1])[0]
+            for system in self.system_categories:
+                score = system_scores.get(system, 0)
+                if score > best_score:
+                    best_system, best_score = system, score
         
-        return "general"
+        return best_system
     
     def extract_red_flags(self, query: str) -> List[str]:
         """Extract red flag symptoms"""
-        red_flags = []
-        
-        for pattern in self.red_flag_patterns:
-            matches = re.findall(pattern, query, re.IGNORECASE)
-            red_flags.extend(matches)
+        matches = [(match.lastindex, match.group()) for match in self._red_flag_combined.finditer(query)]
+        if len(matches) > 1:
+            # Group by pattern, keeping text order within each (the sort is stable)
+            matches.sort(key=itemgetter(0))
         
-        return red_flags
+        return [text for _, text in matches]
     
     def extract_key_symptoms(self, query: str) -> List[str]:
         """Extract key symptoms from query"""
-        # Common symptom patterns
-        symptom_patterns = [
-            r"\b(fever|temperature|pyrexia)\b",
-            r"\b(cough|wheeze|breathing\s*difficulty)\b",
-            r"\b(vomiting|nausea|diarrhea|constipation)\b",
-            r"\b(rash|skin\s*changes|lesion)\b",
-            r"\b(headache|pain|ache|discomfort)\b",
-            r"\b(fatigue|lethargy|weakness)\b",
-            r"\b(loss\s*of\s*appetite|poor\s*feeding)\b",
-            r"\b(irritability|fussiness|behavior\s*changes)\b"
-        ]
-        
+        # Deduplicate as we go, keeping each symptom's first appearance
+        seen = set()
         symptoms = []
-        for pattern in symptom_patterns:
-            matches = re.findall(pattern, query, re.IGNORECASE)
-            symptoms.extend(matches)
+        for pattern in self.symptom_patterns:
+            for symptom in pattern.findall(query):
+                if symptom not in seen:
+                    seen.add(symptom)
+                    symptoms.append(symptom)
         
-        return list(set(symptoms))  # Remove duplicates
+        return symptoms
     
     def parse_diagnosis_text(self, diagnosis_text: str) -> Dict[str, Any]:
         """Parse structured diagnosis from text"""
@@ -190,33 +337,17 @@ class DiagnosisParser:
             "icd_codes": []
         }
         
-        # Split by common delimiters
-        lines = re.split(r'[\n\r]+', diagnosis_text)
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            
-            # Look for primary diagnosis
-            if re.match(r'^(primary\s*diagnosis|main\s*diagnosis|diagnosis):?\s*', line, re.IGNORECASE):
-                parsed["primary_diagnosis"] = re.sub(r'^(primary\s*diagnosis|main\s*diagnosis|diagnosis):?\s*', '', line, flags=re.IGNORECASE)
-            
-            # Look for secondary diagnoses
-            elif re.match(r'^(secondary|additional):?\s*', line, re.IGNORECASE):
-                diagnosis = re.sub(r'^(secondary|additional):?\s*', '', line, flags=re.IGNORECASE)
-                if diagnosis:
-                    parsed["secondary_diagnoses"].append(diagnosis)
-            
-            # Look for differential diagnoses
-            elif re.match(r'^(differential|consider):?\s*', line, re.IGNORECASE):
-                diagnosis = re.sub(r'^(differential|consider):?\s*', '', line, flags=re.IGNORECASE)
-                if diagnosis:
-                    parsed["differential_diagnoses"].append(diagnosis)
-            
-            # Look for ICD codes
-            icd_matches = re.findall(r'\b([A-Z]\d{2}(?:\.\d{1,2})?)\b', line)
-            parsed["icd_codes"].extend(icd_matches)
+        # One scan for headers over the whole text; later primary headers override earlier ones
+        for match in _DIAGNOSIS_HEADER_PATTERN.finditer(diagnosis_text):
+            diagnosis = match.group("value").rstrip()
+            if match.group("primary") is not None:
+                parsed["primary_diagnosis"] = diagnosis
+            elif diagnosis:
+                bucket = "secondary_diagnoses" if match.group("secondary") is not None else "differential_diagnoses"
+                parsed[bucket].append(diagnosis)
+        
+        # ICD codes can appear on any line
+        parsed["icd_codes"] = _ICD_CODE_PATTERN.findall(diagnosis_text)
         
         # If no structured format found, treat entire text as primary diagnosis
         if not parsed["primary_diagnosis"] and diagnosis_text.strip():
@@ -230,56 +361,73 @@ class DiagnosisParser:
     
     def calculate_confidence_score(self, query: str, parsed_data: Dict[str, Any]) -> float:
         """Calculate confidence score for diagnosis"""
-        score = 0.5  # Base score
-        
-        # Increase score for specific age mentions
-        if self.parse_age_group(query) != AgeGroup.SCHOOL_AGE:
-            score += 0.1
-        
-        # Increase score for specific symptoms mentioned
-        if len(parsed_data.get("key_symptoms", [])) > 0:
-            score += 0.2
-        
-        # Increase score for system category identification
-        if parsed_data.get("system_category") != "general":
-            score += 0.1
-        
-        # Decrease score for vague terms
-        vague_terms = ["maybe", "possibly", "unclear", "unknown", "non-specific"]
         query_lower = query.lower()
-        for term in vague_terms:
-            if term in query_lower:
-                score -= 0.1
-        
-        # Ensure score is between 0 and 1
-        return max(0.0, min(1.0, score))
+        return _score_confidence(
+            self._cached_age_group(query_lower) != AgeGroup.SCHOOL_AGE,
+            len(parsed_data.get("key_symptoms", [])) > 0,
+            parsed_data.get("system_category") != "general",
+            _count_vague_terms(query_lower)
+        )
     
     def parse(self, query: str, diagnosis_text: Optional[str] = None) -> ParsedDiagnosis:
         """Main parsing function"""
         logger.info("Parsing diagnosis query", query_length=len(query))
         
-        # Extract basic information
-        age_group = self.parse_age_group(query)
-        urgency_level = self.parse_urgency_level(query)
-        system_category = self.extract_system_category(query)
+        cached = self._cached_parse(query, diagnosis_text)
+        
+        # Hand out fresh lists and a fresh timestamp so callers never share the cached result
+        result = replace(
+            cached,
+            secondary_diagnoses=list(cached.secondary_diagnoses),
+            differential_diagnoses=list(cached.differential_diagnoses),
+            key_symptoms=list(cached.key_symptoms),
+            red_flags=list(cached.red_flags),
+            icd_codes=list(cached.icd_codes),
+            metadata={"parsed_timestamp": datetime.utcnow().isoformat(), **cached.metadata}
+        )
+        
+        logger.debug("Diagnosis parsing complete", 
+                   age_group=_AGE_GROUP_VALUES[result.age_group],
+                   urgency_level=_URGENCY_VALUES[result.urgency_level],
+                   confidence_score=result.confidence_score,
+                   red_flags_count=len(result.red_flags))
+        
+        return result
+    
+    def _parse_uncached(self, query: str, diagnosis_text: Optional[str]) -> ParsedDiagnosis:
+        """Parse a query without logging; metadata carries everything except the timestamp"""
+        # Extract basic information; the classifiers share one lowercased copy of the query
+        query_lower = query.lower()
+        age_group = self._cached_age_group(query_lower)
+        urgency_level = self._cached_urgency_level(query_lower)
+        system_category = self._cached_system_category(query_lower)
         red_flags = self.extract_red_flags(query)
         key_symptoms = self.extract_key_symptoms(query)
         
         # Parse diagnosis text if provided, otherwise use query as diagnosis text
         if diagnosis_text:
             parsed_text = self.parse_diagnosis_text(diagnosis_text)
-        else:
+        elif any(word in query_lower for word in _DIAGNOSIS_HEADER_WORDS):
             # Use query as fallback for diagnosis text parsing
             parsed_text = self.parse_diagnosis_text(query)
+        else:
+            # A query without header words parses to itself as the primary diagnosis
+            parsed_text = {
+                "primary_diagnosis": query.strip() or "unspecified fever",
+                "secondary_diagnoses": [],
+                "differential_diagnoses": [],
+                "icd_codes": _ICD_CODE_PATTERN.findall(query)
+            }
         
-        # Calculate confidence
-        temp_data = {
-            "key_symptoms": key_symptoms,
-            "system_category": system_category
-        }
-        confidence_score = self.calculate_confidence_score(query, temp_data)
+        # Calculate confidence from the classifications already made above
+        confidence_score = _score_confidence(
+            age_group != AgeGroup.SCHOOL_AGE,
+            len(key_symptoms) > 0,
+            system_category != "general",
+            _count_vague_terms(query_lower)
+        )
         
-        result = ParsedDiagnosis(
+        return ParsedDiagnosis(
             primary_diagnosis=parsed_text["primary_diagnosis"],
             secondary_diagnoses=parsed_text["secondary_diagnoses"],
             differential_diagnoses=parsed_text["differential_diagnoses"],
@@ -291,19 +439,10 @@ class DiagnosisParser:
             system_category=system_category,
             icd_codes=parsed_text["icd_codes"],
             metadata={
-                "parsed_timestamp": datetime.utcnow().isoformat(),
                 "query_length": len(query),
                 "has_diagnosis_text": diagnosis_text is not None
             }
         )
-        
-        logger.info("Diagnosis parsing complete", 
-                   age_group=age_group.value,
-                   urgency_level=urgency_level.value,
-                   confidence_score=confidence_score,
-                   red_flags_count=len(red_flags))
-        
-        return result
 
 class DiagnosisValidator:
     """Validates parsed diagnoses for safety and accuracy"""
@@ -324,6 +463,12 @@ class DiagnosisValidator:
             ("aspirin", "child"),
             ("codeine", "child < 12 years")
         ]
+        # Each term carries (pair index, side bit); a pair is present once both bits are seen
+        self._contraindication_matcher = KeywordMatcher(
+            (term.lower(), (index, 1 << side))
+            for index, pair in enumerate(self.contraindicated_combinations)
+            for side, term in enumerate(pair)
+        )
     
     def validate_age_appropriateness(self, diagnosis: ParsedDiagnosis) -> bool:
         """Check if diagnosis is appropriate for age group"""
@@ -338,12 +483,20 @@ class DiagnosisValidator:
         # If no specific age-appropriate conditions found, check confidence
         return diagnosis.confidence_score >= 0.7
     
+    def find_contraindicated_combinations(self, text: str) -> List[Tuple[str, str]]:
+        """Return the contraindicated pairs whose terms both occur in the text"""
+        seen = [0] * len(self.contraindicated_combinations)
+        for index, bit in self._contraindication_matcher.find_payloads(text.lower()):
+            seen[index] |= bit
+        
+        return [pair for pair, sides in zip(self.contraindicated_combinations, seen) if sides == 0b11]
+    
     def validate_red_flags(self, diagnosis: ParsedDiagnosis) -> List[str]:
         """Validate red flags and return warnings"""
         warnings = []
         
         # Check for high urgency without red flags
-        if diagnosis.urgency_level in [UrgencyLevel.EMERGENCY, UrgencyLevel.URGENT]:
+        if diagnosis.urgency_level in _HIGH_URGENCY_LEVELS:
             if not diagnosis.red_flags:
                 warnings.append("High urgency level but no red flags identified")
         
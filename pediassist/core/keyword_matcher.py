@@ -0,0 +1,57 @@
+"""
+Single-pass multi-keyword matching for clinical text
+"""
+
+import re
+from typing import Any, Dict, FrozenSet, Iterable, Set, Tuple
+
+
+class KeywordMatcher:
+    """Find every keyword occurring as a substring of a text in one scan
+
+    Keywords are compiled into a single zero-width alternation so overlapping
+    occurrences are all reported. At each position the regex only reports the
+    longest keyword, so every shorter keyword that is a prefix of it is expanded
+    from a table built once here. Matching is case-sensitive; callers pass
+    lowercased keywords and lowercased text.
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[str, Any]]):
+        """Build the matcher from (keyword, payload) pairs; a keyword may carry several payloads"""
+        payloads: Dict[str, Set[Any]] = {}
+        for keyword, payload in keywords:
+            if keyword:
+                payloads.setdefault(keyword, set()).add(payload)
+
+        self.payloads: Dict[str, FrozenSet[Any]] = {
+            keyword: frozenset(values) for keyword, values in payloads.items()
+        }
+
+        # A match of a longer keyword implies a match of each keyword that prefixes it
+        self._expansions: Dict[str, Tuple[str, ...]] = {
+            keyword: tuple(other for other in self.payloads if keyword.startswith(other))
+            for keyword in self.payloads
+        }
+
+        if self.payloads:
+            alternation = "|".join(re.escape(keyword) for keyword in sorted(self.payloads, key=len, reverse=True))
+            self._pattern = re.compile(f"(?=({alternation}))")
+        else:
+            self._pattern = None
+
+    def find(self, text: str) -> Set[str]:
+        """Return the set of keywords contained in the text"""
+        found: Set[str] = set()
+        if self._pattern is None:
+            return found
+
+        for longest in {match.group(1) for match in self._pattern.finditer(text)}:
+            found.update(self._expansions[longest])
+        return found
+
+    def find_payloads(self, text: str) -> Set[Any]:
+        """Return the union of payloads for every keyword contained in the text"""
+        result: Set[Any] = set()
+        for keyword in self.find(text):
+            result.update(self.payloads[keyword])
+        return result
@@ -2,20 +2,245 @@
 Treatment protocol generation engine
 """
 
+import functools
 import json
 import re
-from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass
+import sys
+from typing import Dict, List, Mapping, NamedTuple, Optional, Any, Tuple
+from dataclasses import asdict, dataclass, field
 from enum import Enum
 import structlog
 from datetime import datetime, timedelta
 from decimal import Decimal
+from types import MappingProxyType
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
 
 # Import TreatmentLevel from the main treatment_generator module
 from ..treatment_generator import TreatmentLevel
+from .keyword_matcher import KeywordMatcher
 
 logger = structlog.get_logger(__name__)
 
+# Diagnosis keyword flags, one bit per keyword the generators branch on
+_DX_INFECTION = 1 << 0
+_DX_FEVER = 1 << 1
+_DX_BACTERIAL = 1 << 2
+_DX_PNEUMONIA = 1 << 3
+_DX_RESPIRATORY = 1 << 4
+_DX_RARE = 1 << 5
+_DX_COMPLEX = 1 << 6
+_DX_ATYPICAL = 1 << 7
+
+# Keyword groups that raise or lower treatment confidence
+_DX_ESTABLISHED = _DX_FEVER | _DX_RESPIRATORY | _DX_INFECTION
+_DX_UNCERTAIN = _DX_RARE | _DX_COMPLEX | _DX_ATYPICAL
+
+# Age groups with higher treatment complexity
+_YOUNG_AGE_GROUPS = frozenset({"newborn", "infant"})
+
+# Age groups dosed with liquid formulations
+_LIQUID_FORMULATION_AGE_GROUPS = frozenset({"infant", "toddler"})
+
+# Dosing frequencies the validator accepts without a warning
+_STANDARD_FREQUENCIES = frozenset({"q4-6h", "q6-8h", "q8-12h", "bid", "daily"})
+
+_DIAGNOSIS_KEYWORD_MATCHER = KeywordMatcher([
+    ("infection", _DX_INFECTION),
+    ("fever", _DX_FEVER),
+    ("bacterial", _DX_BACTERIAL),
+    ("pneumonia", _DX_PNEUMONIA),
+    ("respiratory", _DX_RESPIRATORY),
+    ("rare", _DX_RARE),
+    ("complex", _DX_COMPLEX),
+    ("atypical", _DX_ATYPICAL)
+])
+
+@functools.lru_cache(maxsize=4096)
+def _classify_diagnosis(diagnosis: str) -> Tuple[int, str]:
+    """Return a diagnosis's keyword flags and protocol category, shared by every generator step"""
+    flags = 0
+    for flag in _DIAGNOSIS_KEYWORD_MATCHER.find_payloads(diagnosis.lower()):
+        flags |= flag
+    
+    # Determine protocol category
+    if flags & _DX_RESPIRATORY:
+        protocol_category = "respiratory_infection"
+    elif flags & _DX_FEVER:
+        protocol_category = "fever_management"
+    else:
+        protocol_category = "general"
+    
+    return flags, protocol_category
+
+# Protocol template sections to include for each urgency level, in step order
+_STEP_PRIORITIES_ROUTINE = ("medium",)
+_STEP_PRIORITIES_BY_URGENCY = MappingProxyType({
+    "emergency": ("immediate", "high", "medium"),
+    "urgent": ("high", "medium")
+})
+
+# Static protocol text, shared by every generated protocol
+_MONITORING_EMERGENCY = (
+    "Continuous vital signs monitoring",
+    "Neurological assessments q15min",
+    "Fluid balance monitoring"
+)
+_MONITORING_URGENT = (
+    "Vital signs q4h",
+    "Clinical reassessment in 24 hours",
+    "Symptom progression monitoring"
+)
+_MONITORING_ROUTINE = (
+    "Vital signs as clinically indicated",
+    "Follow-up in 1-2 weeks",
+    "Patient education on warning signs"
+)
+_MONITORING_RESPIRATORY = (
+    "Respiratory rate and effort assessment",
+    "Oxygen saturation monitoring"
+)
+_MONITORING_FEVER = (
+    "Temperature monitoring",
+    "Hydration status assessment"
+)
+_MONITORING_BY_URGENCY = MappingProxyType({
+    "emergency": _MONITORING_EMERGENCY,
+    "urgent": _MONITORING_URGENT
+})
+
+_FOLLOW_UP_EMERGENCY = (
+    "24-48 hours: Clinical reassessment",
+    "1 week: Symptom resolution check"
+)
+_FOLLOW_UP_URGENT = (
+    "48-72 hours: Phone follow-up",
+    "1-2 weeks: Clinical visit if needed"
+)
+_FOLLOW_UP_ROUTINE = (
+    "1-2 weeks: Routine follow-up",
+    "As needed for persistent symptoms"
+)
+_FOLLOW_UP_BY_URGENCY = MappingProxyType({
+    "emergency": _FOLLOW_UP_EMERGENCY,
+    "urgent": _FOLLOW_UP_URGENT
+})
+
+# Follow-up schedules joined once into the protocol's instruction text
+_FOLLOW_UP_TEXT_ROUTINE = "\n".join(_FOLLOW_UP_ROUTINE)
+_FOLLOW_UP_TEXT_BY_URGENCY = MappingProxyType({
+    urgency_level: "\n".join(schedule) for urgency_level, schedule in _FOLLOW_UP_BY_URGENCY.items()
+})
+
+_RED_FLAGS_GENERAL = (
+    "Worsening symptoms despite treatment",
+    "New fever > 38.5°C",
+    "Difficulty breathing or chest pain",
+    "Altered mental status or confusion",
+    "Inability to tolerate oral intake"
+)
+_RED_FLAGS_YOUNG = _RED_FLAGS_GENERAL + (
+    "Temperature > 38°C in infant < 3 months",
+    "Poor feeding or decreased urine output",
+    "Persistent crying or irritability"
+)
+
+_REFERRAL_EMERGENCY = (
+    "Immediate emergency department referral",
+    "Critical care consultation if unstable"
+)
+_REFERRAL_URGENT = (
+    "Pediatric specialist consultation within 24 hours",
+    "Consider hospital admission if severe"
+)
+_REFERRAL_ROUTINE = (
+    "Specialist referral if symptoms persist > 1 week",
+    "Consider second opinion if no improvement"
+)
+_REFERRAL_BY_URGENCY = MappingProxyType({
+    "emergency": _REFERRAL_EMERGENCY,
+    "urgent": _REFERRAL_URGENT
+})
+
+_EDUCATION_GENERAL = (
+    "Complete full course of prescribed medications",
+    "Return for follow-up as scheduled",
+    "Contact provider if symptoms worsen"
+)
+_EDUCATION_INFECTION = (
+    "Practice good hand hygiene",
+    "Avoid sharing personal items",
+    "Stay home until fever-free for 24 hours"
+)
+_EDUCATION_FEVER = (
+    "Monitor temperature regularly",
+    "Ensure adequate fluid intake",
+    "Use antipyretics as directed"
+)
+_EDUCATION_AGE_APPROPRIATE = ("Explain procedure/treatment in age-appropriate language",)
+
+# Age groups that get the age-appropriate explanation point
+_EXPLAINABLE_AGE_GROUPS = frozenset({"toddler", "preschool", "school_age"})
+
+class _DoseRecord(NamedTuple):
+    """Dosing for one medication and age group, with defaults already applied"""
+    dose: str
+    frequency: str
+    duration: str
+    dose_per_kg: Optional[float]
+
+_UNKNOWN_DOSING = _DoseRecord("See dosing guidelines", "As directed", "As clinically indicated", None)
+
+class _MedicationChoice(NamedTuple):
+    """A medication chosen for a diagnosis, with the notes that go on its dose"""
+    name: str
+    indications: Tuple[str, ...]
+    contraindications: Tuple[str, ...]
+    side_effects: Tuple[str, ...]
+
+_ACETAMINOPHEN = _MedicationChoice(
+    "acetaminophen", ("fever", "pain"), ("severe hepatic impairment",), ("hepatotoxicity (rare)",)
+)
+_IBUPROFEN = _MedicationChoice(
+    "ibuprofen", ("fever", "pain", "inflammation"), ("active bleeding", "renal disease"), ("GI upset", "bleeding")
+)
+_AMOXICILLIN = _MedicationChoice(
+    "amoxicillin", ("bacterial infection", "pneumonia", "otitis media"), ("penicillin allergy",),
+    ("diarrhea", "rash", "allergic reaction")
+)
+
+def _encode_extension(value: Any) -> Any:
+    """Encode the non-primitive protocol values msgpack cannot pack natively"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def _intern(value: Any) -> Any:
+    """Intern caller-supplied strings that are stored on many protocols and doses"""
+    return sys.intern(value) if type(value) is str else value
+
+def _freeze(value: Any) -> Any:
+    """Recursively turn dicts into read-only mappings and lists into tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
 class TreatmentPriority(Enum):
     """Treatment priority levels"""
     LOW = "low"
@@ -32,7 +257,15 @@ class TreatmentCategory(Enum):
     REFERRAL = "referral"
     EDUCATION = "education"
 
-@dataclass
+# Urgency level to protocol priority
+_PRIORITY_MAP = MappingProxyType({
+    "immediate": TreatmentPriority.CRITICAL,
+    "high": TreatmentPriority.HIGH,
+    "medium": TreatmentPriority.MEDIUM,
+    "low": TreatmentPriority.LOW
+})
+
+@dataclass(slots=True)
 class MedicationDose:
     """Medication dosing information"""
     medication_name: str
@@ -49,7 +282,7 @@ class MedicationDose:
     formulation: str
     brand_names: List[str]
 
-@dataclass
+@dataclass(slots=True)
 class TreatmentStep:
     """Individual treatment step"""
     step_number: int
@@ -64,7 +297,7 @@ class TreatmentStep:
     evidence_level: str
     clinical_notes: str
 
-@dataclass
+@dataclass(slots=True)
 class TreatmentProtocol:
     """Complete treatment protocol"""
     diagnosis: str
@@ -78,50 +311,44 @@ class TreatmentProtocol:
     red_flags: List[str]
     duration_estimate: str
     cost_estimate: Optional[float] = None
-    created_at: datetime = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
     # Keep original fields for backward compatibility
     age_group: str = ""
     urgency_level: str = ""
-    primary_treatments: List[TreatmentStep] = None
-    alternative_treatments: List[TreatmentStep] = None
-    monitoring_plan: List[str] = None
-    follow_up_schedule: List[str] = None
-    red_flag_criteria: List[str] = None
-    referral_criteria: List[str] = None
+    primary_treatments: List[TreatmentStep] = field(default_factory=list)
+    alternative_treatments: List[TreatmentStep] = field(default_factory=list)
+    monitoring_plan: List[str] = field(default_factory=list)
+    follow_up_schedule: List[str] = field(default_factory=list)
+    red_flag_criteria: List[str] = field(default_factory=list)
+    referral_criteria: List[str] = field(default_factory=list)
     evidence_summary: str = ""
-    last_updated: datetime = None
+    last_updated: Optional[datetime] = None
     confidence_score: float = 0.0
-    metadata: Dict[str, Any] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
     
-    def __post_init__(self):
-        if self.created_at is None:
-            self.created_at = datetime.utcnow()
-        if self.primary_treatments is None:
-            self.primary_treatments = []
-        if self.alternative_treatments is None:
-            self.alternative_treatments = []
-        if self.monitoring_plan is None:
-            self.monitoring_plan = []
-        if self.follow_up_schedule is None:
-            self.follow_up_schedule = []
-        if self.red_flag_criteria is None:
-            self.red_flag_criteria = []
-        if self.referral_criteria is None:
-            self.referral_criteria = []
-        if self.metadata is None:
-            self.metadata = {}
+    def as_msgpack(self) -> bytes:
+        """Serialize the protocol, including its steps, to msgpack bytes"""
+        if not MSGPACK_AVAILABLE:
+            raise ImportError("msgpack package not available. Install with: pip install msgpack")
+        
+        return msgpack.packb(asdict(self), use_bin_type=True, default=_encode_extension)
 
 class TreatmentGenerator:
     """Advanced treatment protocol generator"""
     
     def __init__(self):
+        # Reference data is built once per process and shared read-only by every generator
         self.medication_database = self._load_medication_database()
         self.protocol_templates = self._load_protocol_templates()
         self.evidence_database = self._load_evidence_database()
+        self.brand_names = self._load_brand_names()
+        self._dosing_table = self._load_dosing_table()
     
-    def _load_medication_database(self) -> Dict[str, Any]:
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _load_medication_database() -> Mapping[str, Any]:
         """Load medication database with pediatric dosing"""
-        return {
+        return _freeze({
             "acetaminophen": {
                 "class": "analgesic/antipyretic",
                 "dosing": {
@@ -155,11 +382,30 @@ class TreatmentGenerator:
                 "side_effects": ["diarrhea", "rash", "allergic reaction"],
                 "monitoring": ["clinical response after 48-72 hours"]
             }
-        }
+        })
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _load_dosing_table() -> Mapping[Tuple[str, str], _DoseRecord]:
+        """Flatten medication dosing into one table keyed by (medication, age group)"""
+        dosing_table = {}
+        for medication_name, med_info in TreatmentGenerator._load_medication_database().items():
+            for age_group, dosing_info in med_info.get("dosing", {}).items():
+                dose = dosing_info.get("dose", _UNKNOWN_DOSING.dose)
+                dosing_table[medication_name, age_group] = _DoseRecord(
+                    dose=dose,
+                    frequency=dosing_info.get("frequency", _UNKNOWN_DOSING.frequency),
+                    duration=dosing_info.get("duration", _UNKNOWN_DOSING.duration),
+                    # Low end of a mg/kg dose range, parsed once instead of per dose
+                    dose_per_kg=float(dose.split("-")[0].strip().split()[0]) if "mg/kg" in dose else None
+                )
+        return MappingProxyType(dosing_table)
     
-    def _load_protocol_templates(self) -> Dict[str, Any]:
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _load_protocol_templates() -> Mapping[str, Any]:
         """Load evidence-based protocol templates"""
-        return {
+        return _freeze({
             "respiratory_infection": {
                 "immediate": [
                     {
@@ -204,91 +450,128 @@ class TreatmentGenerator:
                     }
                 ]
             }
-        }
+        })
     
-    def _load_evidence_database(self) -> Dict[str, str]:
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _load_evidence_database() -> Mapping[str, str]:
         """Load evidence levels and sources"""
-        return {
+        return MappingProxyType({
             "immediate_assessment": "AAP Guidelines 2023",
             "antibiotic_therapy": "IDSA Guidelines 2021",
             "fever_management": "AAP Clinical Practice Guidelines 2021",
             "pain_management": "WHO Guidelines on Pain Management in Children 2020"
-        }
+        })
     
-    def generate_medication_doses(self, diagnosis: str, age_group: str, weight_kg: Optional[float] = None) -> List[MedicationDose]:
-        """Generate age-appropriate medication dosing"""
-        medications = []
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _load_brand_names() -> Mapping[str, Tuple[str, ...]]:
+        """Load brand names for medications"""
+        return MappingProxyType({
+            "acetaminophen": ("Tylenol", "Panadol"),
+            "ibuprofen": ("Advil", "Motrin"),
+            "amoxicillin": ("Amoxil", "Trimox")
+        })
+    
+    @staticmethod
+    def _select_medications(diagnosis: str, age_group: str) -> List[_MedicationChoice]:
+        """Choose the medications appropriate for a diagnosis and age group"""
+        choices = []
+        flags, _ = _classify_diagnosis(diagnosis)
         
-        # Determine which medications are appropriate for the diagnosis
-        if "infection" in diagnosis.lower() or "fever" in diagnosis.lower():
+        if flags & (_DX_INFECTION | _DX_FEVER):
             # Acetaminophen for fever/pain
-            acetaminophen = self._create_medication_dose(
-                "acetaminophen", age_group, weight_kg,
-                indications=["fever", "pain"],
-                contraindications=["severe hepatic impairment"],
-                side_effects=["hepatotoxicity (rare)"]
-            )
-            medications.append(acetaminophen)
+            choices.append(_ACETAMINOPHEN)
             
             # Ibuprofen for fever/pain (if >6 months)
-            if age_group not in ["newborn", "infant"]:
-                ibuprofen = self._create_medication_dose(
-                    "ibuprofen", age_group, weight_kg,
-                    indications=["fever", "pain", "inflammation"],
-                    contraindications=["active bleeding", "renal disease"],
-                    side_effects=["GI upset", "bleeding"]
-                )
-                medications.append(ibuprofen)
+            if age_group not in _YOUNG_AGE_GROUPS:
+                choices.append(_IBUPROFEN)
         
-        if "bacterial" in diagnosis.lower() or "pneumonia" in diagnosis.lower():
+        if flags & (_DX_BACTERIAL | _DX_PNEUMONIA):
             # Amoxicillin for bacterial infections
-            amoxicillin = self._create_medication_dose(
-                "amoxicillin", age_group, weight_kg,
-                indications=["bacterial infection", "pneumonia", "otitis media"],
-                contraindications=["penicillin allergy"],
-                side_effects=["diarrhea", "rash", "allergic reaction"]
-            )
-            medications.append(amoxicillin)
-        
-        return medications
+            choices.append(_AMOXICILLIN)
+        
+        return choices
+    
+    def generate_medication_doses(self, diagnosis: str, age_group: str, weight_kg: Optional[float] = None) -> List[MedicationDose]:
+        """Generate age-appropriate medication dosing"""
+        return [
+            self._create_medication_dose(choice.name, age_group, weight_kg, list(choice.indications),
+                                         choice.contraindications, choice.side_effects)
+            for choice in self._select_medications(diagnosis, age_group)
+        ]
+    
+    def generate_medication_doses_batch(self, diagnoses: List[str], age_groups: List[str],
+                                        weights_kg: List[Optional[float]]) -> List[List[MedicationDose]]:
+        """Generate medication dosing for a cohort of patients, one list of doses per patient"""
+        if not len(diagnoses) == len(age_groups) == len(weights_kg):
+            raise ValueError("diagnoses, age_groups and weights_kg must have the same length")
+        
+        cohort = [
+            (self._select_medications(diagnosis, age_group), age_group, weight_kg)
+            for diagnosis, age_group, weight_kg in zip(diagnoses, age_groups, weights_kg)
+        ]
+        
+        # Gather every weight-based dose in the cohort so the mg/kg multiply runs once
+        doses_per_kg, weights, positions = [], [], []
+        for patient, (choices, age_group, weight_kg) in enumerate(cohort):
+            for slot, choice in enumerate(choices):
+                dose_per_kg = self._dosing_table.get((choice.name, age_group), _UNKNOWN_DOSING).dose_per_kg
+                if weight_kg and dose_per_kg is not None:
+                    doses_per_kg.append(dose_per_kg)
+                    weights.append(weight_kg)
+                    positions.append((patient, slot))
+        
+        if NUMPY_AVAILABLE:
+            # float64 products equal Python float products, so the formatted doses are unchanged
+            doses_mg = (np.asarray(doses_per_kg, dtype=np.float64) * np.asarray(weights, dtype=np.float64)).tolist()
+        else:
+            doses_mg = [dose_per_kg * weight_kg for dose_per_kg, weight_kg in zip(doses_per_kg, weights)]
+        calculated_doses = {position: f"{dose_mg:.0f} mg" for position, dose_mg in zip(positions, doses_mg)}
+        
+        return [
+            [
+                self._create_medication_dose(choice.name, age_group, weight_kg, list(choice.indications),
+                                             choice.contraindications, choice.side_effects,
+                                             calculated_dose=calculated_doses.get((patient, slot)))
+                for slot, choice in enumerate(choices)
+            ]
+            for patient, (choices, age_group, weight_kg) in enumerate(cohort)
+        ]
     
     def _create_medication_dose(self, medication_name: str, age_group: str, weight_kg: Optional[float], 
-                              indications: List[str], contraindications: List[str], side_effects: List[str]) -> MedicationDose:
-        """Create medication dose object"""
+                              indications: List[str], contraindications: List[str], side_effects: List[str],
+                              calculated_dose: Optional[str] = None) -> MedicationDose:
+        """Create medication dose object, using a weight-based dose already computed for a batch if given"""
         med_info = self.medication_database.get(medication_name, {})
-        dosing_info = med_info.get("dosing", {}).get(age_group, {})
+        dosing = self._dosing_table.get((medication_name, age_group), _UNKNOWN_DOSING)
         
-        # Calculate specific dose if weight provided
-        if weight_kg and "dose" in dosing_info and "mg/kg" in dosing_info["dose"]:
-            dose_per_kg = float(dosing_info["dose"].split("-")[0].strip().split()[0])
-            calculated_dose = f"{dose_per_kg * weight_kg:.0f} mg"
-        else:
-            calculated_dose = dosing_info.get("dose", "See dosing guidelines")
+        if calculated_dose is None:
+            # Calculate specific dose if weight provided and the dose is weight-based
+            if weight_kg and dosing.dose_per_kg is not None:
+                calculated_dose = f"{dosing.dose_per_kg * weight_kg:.0f} mg"
+            else:
+                calculated_dose = dosing.dose
         
         return MedicationDose(
             medication_name=medication_name,
             dose=calculated_dose,
-            frequency=dosing_info.get("frequency", "As directed"),
-            duration=dosing_info.get("duration", "As clinically indicated"),
+            frequency=dosing.frequency,
+            duration=dosing.duration,
             route="oral",
             age_range=age_group,
             weight_range=f"{weight_kg} kg" if weight_kg else "Weight-based dosing",
             indications=indications,
-            contraindications=contraindications + med_info.get("contraindications", []),
-            side_effects=side_effects + med_info.get("side_effects", []),
-            monitoring_requirements=med_info.get("monitoring", []),
-            formulation="liquid/suspension" if age_group in ["infant", "toddler"] else "tablet/capsule",
+            contraindications=[*contraindications, *med_info.get("contraindications", ())],
+            side_effects=[*side_effects, *med_info.get("side_effects", ())],
+            monitoring_requirements=list(med_info.get("monitoring", ())),
+            formulation="liquid/suspension" if age_group in _LIQUID_FORMULATION_AGE_GROUPS else "tablet/capsule",
             brand_names=self._get_brand_names(medication_name)
         )
     
     def _get_brand_names(self, medication_name: str) -> List[str]:
         """Get brand names for medications"""
-        brand_names = {
-            "acetaminophen": ["Tylenol", "Panadol"],
-            "ibuprofen": ["Advil", "Motrin"],
-            "amoxicillin": ["Amoxil", "Trimox"]
-        }
-        return brand_names.get(medication_name, [])
+        return list(self.brand_names.get(medication_name, ()))
     
     def generate_treatment_steps(self, diagnosis: str, urgency_level: str, age_group: str) -> List[TreatmentStep]:
         """Generate treatment steps based on diagnosis and urgency"""
@@ -296,33 +579,15 @@ class TreatmentGenerator:
         step_number = 1
         
         # Determine protocol category
-        if "respiratory" in diagnosis.lower():
-            protocol_category = "respiratory_infection"
-        elif "fever" in diagnosis.lower():
-            protocol_category = "fever_management"
-        else:
-            protocol_category = "general"
-        
+        _, protocol_category = _classify_diagnosis(diagnosis)
         protocol = self.protocol_templates.get(protocol_category, {})
         
-        # Generate steps based on urgency
-        if urgency_level == "emergency":
-            # Immediate priority steps
-            for step_data in protocol.get("immediate", []):
-                steps.append(self._create_treatment_step(step_number, step_data))
-                step_number += 1
-        
-        if urgency_level in ["emergency", "urgent"]:
-            # High priority steps
-            for step_data in protocol.get("high", []):
+        # Generate steps based on urgency; medium priority steps are always included
+        for template_priority in _STEP_PRIORITIES_BY_URGENCY.get(urgency_level, _STEP_PRIORITIES_ROUTINE):
+            for step_data in protocol.get(template_priority, ()):
                 steps.append(self._create_treatment_step(step_number, step_data))
                 step_number += 1
         
-        # Always include medium priority steps
-        for step_data in protocol.get("medium", []):
-            steps.append(self._create_treatment_step(step_number, step_data))
-            step_number += 1
-        
         return steps
     
     def _create_treatment_step(self, step_number: int, step_data: Dict[str, Any]) -> TreatmentStep:
@@ -337,152 +602,82 @@ class TreatmentGenerator:
             monitoring=[],
             follow_up=None,
             conditions=[],
-            evidence_level=self._get_evidence_level(step_data.get("step", "")),
+            evidence_level=self._get_evidence_level(step_data.get("step", "").lower()),
             clinical_notes=""
         )
     
-    def _get_evidence_level(self, step_title: str) -> str:
-        """Get evidence level for treatment step"""
-        if "assess" in step_title.lower():
+    def _get_evidence_level(self, step_title_lower: str) -> str:
+        """Get evidence level for a lowercased treatment step title"""
+        if "assess" in step_title_lower:
             return "AAP Guidelines 2023"
-        elif "antibiotic" in step_title.lower():
+        elif "antibiotic" in step_title_lower:
             return "IDSA Guidelines 2021"
         else:
             return "Clinical Practice Guidelines"
     
-    def generate_monitoring_plan(self, diagnosis: str, urgency_level: str) -> List[str]:
+    @staticmethod
+    def generate_monitoring_plan(diagnosis: str, urgency_level: str) -> List[str]:
         """Generate monitoring plan"""
-        monitoring = []
-        
-        if urgency_level == "emergency":
-            monitoring.extend([
-                "Continuous vital signs monitoring",
-                "Neurological assessments q15min",
-                "Fluid balance monitoring"
-            ])
-        elif urgency_level == "urgent":
-            monitoring.extend([
-                "Vital signs q4h",
-                "Clinical reassessment in 24 hours",
-                "Symptom progression monitoring"
-            ])
-        else:
-            monitoring.extend([
-                "Vital signs as clinically indicated",
-                "Follow-up in 1-2 weeks",
-                "Patient education on warning signs"
-            ])
+        monitoring = _MONITORING_BY_URGENCY.get(urgency_level, _MONITORING_ROUTINE)
         
         # Diagnosis-specific monitoring
-        if "respiratory" in diagnosis.lower():
-            monitoring.append("Respiratory rate and effort assessment")
-            monitoring.append("Oxygen saturation monitoring")
+        flags, _ = _classify_diagnosis(diagnosis)
+        if flags & _DX_RESPIRATORY:
+            monitoring += _MONITORING_RESPIRATORY
         
-        if "fever" in diagnosis.lower():
-            monitoring.append("Temperature monitoring")
-            monitoring.append("Hydration status assessment")
+        if flags & _DX_FEVER:
+            monitoring += _MONITORING_FEVER
         
-        return monitoring
+        return list(monitoring)
     
-    def generate_follow_up_schedule(self, diagnosis: str, urgency_level: str) -> List[str]:
+    @staticmethod
+    def generate_follow_up_schedule(diagnosis: str, urgency_level: str) -> List[str]:
         """Generate follow-up schedule"""
-        follow_up = []
-        
-        if urgency_level == "emergency":
-            follow_up.extend([
-                "24-48 hours: Clinical reassessment",
-                "1 week: Symptom resolution check"
-            ])
-        elif urgency_level == "urgent":
-            follow_up.extend([
-                "48-72 hours: Phone follow-up",
-                "1-2 weeks: Clinical visit if needed"
-            ])
-        else:
-            follow_up.extend([
-                "1-2 weeks: Routine follow-up",
-                "As needed for persistent symptoms"
-            ])
-        
-        return follow_up
+        return list(_FOLLOW_UP_BY_URGENCY.get(urgency_level, _FOLLOW_UP_ROUTINE))
+    
+    @staticmethod
+    def generate_follow_up_text(urgency_level: str) -> str:
+        """Generate the follow-up schedule as instruction text, one entry per line"""
+        return _FOLLOW_UP_TEXT_BY_URGENCY.get(urgency_level, _FOLLOW_UP_TEXT_ROUTINE)
     
-    def generate_red_flags(self, diagnosis: str, age_group: str) -> List[str]:
+    @staticmethod
+    def generate_red_flags(diagnosis: str, age_group: str) -> List[str]:
         """Generate red flag criteria"""
-        red_flags = [
-            "Worsening symptoms despite treatment",
-            "New fever > 38.5°C",
-            "Difficulty breathing or chest pain",
-            "Altered mental status or confusion",
-            "Inability to tolerate oral intake"
-        ]
-        
         # Age-specific red flags
-        if age_group in ["newborn", "infant"]:
-            red_flags.extend([
-                "Temperature > 38°C in infant < 3 months",
-                "Poor feeding or decreased urine output",
-                "Persistent crying or irritability"
-            ])
-        
-        return red_flags
+        if age_group in _YOUNG_AGE_GROUPS:
+            return list(_RED_FLAGS_YOUNG)
+        return list(_RED_FLAGS_GENERAL)
     
-    def generate_referral_criteria(self, diagnosis: str, urgency_level: str) -> List[str]:
+    @staticmethod
+    def generate_referral_criteria(diagnosis: str, urgency_level: str) -> List[str]:
         """Generate referral criteria"""
-        referral_criteria = []
-        
-        if urgency_level == "emergency":
-            referral_criteria.extend([
-                "Immediate emergency department referral",
-                "Critical care consultation if unstable"
-            ])
-        elif urgency_level == "urgent":
-            referral_criteria.extend([
-                "Pediatric specialist consultation within 24 hours",
-                "Consider hospital admission if severe"
-            ])
-        else:
-            referral_criteria.extend([
-                "Specialist referral if symptoms persist > 1 week",
-                "Consider second opinion if no improvement"
-            ])
-        
-        return referral_criteria
+        return list(_REFERRAL_BY_URGENCY.get(urgency_level, _REFERRAL_ROUTINE))
     
-    def generate_patient_education(self, diagnosis: str, age_group: str) -> List[str]:
+    @staticmethod
+    def generate_patient_education(diagnosis: str, age_group: str) -> List[str]:
         """Generate patient education points"""
-        education = []
-        
         # General education
-        education.extend([
-            "Complete full course of prescribed medications",
-            "Return for follow-up as scheduled",
-            "Contact provider if symptoms worsen"
-        ])
+        education = _EDUCATION_GENERAL
         
         # Diagnosis-specific education
-        if "infection" in diagnosis.lower():
-            education.extend([
-                "Practice good hand hygiene",
-                "Avoid sharing personal items",
-                "Stay home until fever-free for 24 hours"
-            ])
-        
-        if "fever" in diagnosis.lower():
-            education.extend([
-                "Monitor temperature regularly",
-                "Ensure adequate fluid intake",
-                "Use antipyretics as directed"
-            ])
+        flags, _ = _classify_diagnosis(diagnosis)
+        if flags & _DX_INFECTION:
+            education += _EDUCATION_INFECTION
+        
+        if flags & _DX_FEVER:
+            education += _EDUCATION_FEVER
         
         # Age-appropriate education
-        if age_group in ["toddler", "preschool", "school_age"]:
-            education.append("Explain procedure/treatment in age-appropriate language")
+        if age_group in _EXPLAINABLE_AGE_GROUPS:
+            education += _EDUCATION_AGE_APPROPRIATE
         
-        return education
+        return list(education)
     
     def generate_protocol(self, diagnosis: str, age_group: str, urgency_level: str, 
                          weight_kg: Optional[float] = None, patient_context: Optional[Dict[str, Any]] = None) -> TreatmentProtocol:
         """Generate complete treatment protocol"""
+        age_group = _intern(age_group)
+        urgency_level = _intern(urgency_level)
         logger.info("Generating treatment protocol", 
                    diagnosis=diagnosis, 
                    age_group=age_group, 
@@ -502,33 +697,31 @@ class TreatmentGenerator:
         confidence_score = self._calculate_confidence_score(diagnosis, age_group, urgency_level)
         
         # Map urgency level to TreatmentPriority
-        priority_map = {
-            "immediate": TreatmentPriority.CRITICAL,
-            "high": TreatmentPriority.HIGH,
-            "medium": TreatmentPriority.MEDIUM,
-            "low": TreatmentPriority.LOW
-        }
-        priority = priority_map.get(urgency_level, TreatmentPriority.MEDIUM)
+        priority = _PRIORITY_MAP.get(urgency_level, TreatmentPriority.MEDIUM)
         
         # Map complexity to TreatmentLevel (default to basic for now)
         plan_type = TreatmentLevel.BASIC  # Could be enhanced based on complexity
 
+        # One timestamp for the whole protocol
+        now = datetime.utcnow()
+
         # Convert medications to the expected format (List[Dict[str, Any]])
-        medication_dicts = []
-        for med in medications:
-            medication_dicts.append({
+        medication_dicts = [
+            {
                 "name": med.medication_name,
                 "dosing": f"{med.dose} {med.frequency}",
                 "monitoring": med.monitoring_requirements,
                 "route": med.route,
                 "duration": med.duration
-            })
+            }
+            for med in medications
+        ]
 
         # Convert patient education list to string
         education_text = "\n".join(patient_education) if patient_education else ""
         
         # Convert follow up schedule to instructions string
-        follow_up_text = "\n".join(follow_up_schedule) if follow_up_schedule else ""
+        follow_up_text = self.generate_follow_up_text(urgency_level)
 
         protocol = TreatmentProtocol(
             diagnosis=diagnosis,
@@ -542,7 +735,7 @@ class TreatmentGenerator:
             red_flags=red_flag_criteria,
             duration_estimate=follow_up_text,  # Could be enhanced
             cost_estimate=None,  # Could be calculated
-            created_at=datetime.utcnow(),
+            created_at=now,
             # Keep original fields for backward compatibility
             age_group=age_group,
             urgency_level=urgency_level,
@@ -553,10 +746,10 @@ class TreatmentGenerator:
             red_flag_criteria=red_flag_criteria,
             referral_criteria=referral_criteria,
             evidence_summary=self._generate_evidence_summary(diagnosis),
-            last_updated=datetime.utcnow(),
+            last_updated=now,
             confidence_score=confidence_score,
             metadata={
-                "generated_timestamp": datetime.utcnow().isoformat(),
+                "generated_timestamp": now.isoformat(),
                 "patient_context": patient_context or {},
                 "weight_used": weight_kg,
                 "evidence_sources": list(self.evidence_database.values())
@@ -572,19 +765,14 @@ class TreatmentGenerator:
     
     def _calculate_confidence_score(self, diagnosis: str, age_group: str, urgency_level: str) -> float:
         """Calculate confidence score for treatment protocol"""
-        base_score = 0.7
-        
-        # Increase score for well-established protocols
-        if any(term in diagnosis.lower() for term in ["fever", "respiratory", "infection"]):
-            base_score += 0.2
+        flags, _ = _classify_diagnosis(diagnosis)
         
-        # Decrease score for complex or rare conditions
-        if any(term in diagnosis.lower() for term in ["rare", "complex", "atypical"]):
-            base_score -= 0.1
-        
-        # Age group considerations
-        if age_group in ["newborn", "infant"]:
-            base_score -= 0.1  # Higher complexity for very young patients
+        # Established protocols raise the score; rare/complex conditions and very young
+        # patients lower it. Terms are added in that order so the float result is unchanged.
+        base_score = (0.7
+                      + 0.2 * bool(flags & _DX_ESTABLISHED)
+                      - 0.1 * bool(flags & _DX_UNCERTAIN)
+                      - 0.1 * (age_group in _YOUNG_AGE_GROUPS))
         
         return max(0.0, min(1.0, base_score))
     
@@ -607,6 +795,11 @@ class TreatmentValidator:
             "codeine": ["< 12 years", "FDA black box warning for respiratory depression"],
             "ibuprofen": ["< 6 months", "not approved for infants < 6 months"]
         }
+        
+        # Restricted drug names are found in a medication name with one scan; the order index keeps
+        # warnings in age_restrictions order
+        self._restricted_drug_matcher = KeywordMatcher((drug, drug) for drug in self.age_restrictions)
+        self._restriction_order = {drug: index for index, drug in enumerate(self.age_restrictions)}
     
     def validate_medication_safety(self, protocol: TreatmentProtocol) -> List[str]:
         """Validate medication safety"""
@@ -614,10 +807,11 @@ class TreatmentValidator:
         
         for medication in protocol.medications:
             # Check age restrictions
-            for drug, restrictions in self.age_restrictions.items():
-                if drug in medication.medication_name.lower():
-                    if protocol.age_group in restrictions[0]:
-                        warnings.append(f"{drug} contraindicated: {restrictions[1]}")
+            restricted_drugs = self._restricted_drug_matcher.find(medication.medication_name.lower())
+            for drug in sorted(restricted_drugs, key=self._restriction_order.__getitem__):
+                restrictions = self.age_restrictions[drug]
+                if protocol.age_group in restrictions[0]:
+                    warnings.append(f"{drug} contraindicated: {restrictions[1]}")
             
             # Check for duplicate medications in same class
             # (Implementation would check against current medications)
@@ -635,7 +829,7 @@ class TreatmentValidator:
                 pass
             
             # Check frequency appropriateness
-            if medication.frequency not in ["q4-6h", "q6-8h", "q8-12h", "bid", "daily"]:
+            if medication.frequency not in _STANDARD_FREQUENCIES:
                 warnings.append(f"Unusual frequency for {medication.medication_name}: {medication.frequency}")
         
         return warnings
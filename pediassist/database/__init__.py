@@ -3,40 +3,135 @@ Database initialization and migration utilities
 """
 
 import asyncio
+import json
 import os
 from pathlib import Path
-from typing import Optional
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy import text
+from sqlalchemy import JSON, Table, event, func, insert, select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
 import structlog
 
-from .models import Base
+from .migrations import upgrade_schema
+from .models import Base, Diagnosis, Medication, QueryLog, TreatmentProtocol
 from .repository import RepositoryFactory
 
 logger = structlog.get_logger(__name__)
 
+# Usage records are queued and written in batches: at most this many per INSERT, gathered
+# for up to this many seconds, with this many waiting before new records are dropped
+_USAGE_BATCH_SIZE = 500
+_USAGE_FLUSH_INTERVAL = 0.2
+_USAGE_QUEUE_SIZE = 10_000
+
+# Bulk INSERT statements are built once and executed with a list of rows, so each runs as
+# one executemany with a single cached compilation per table
+_DIAGNOSIS_INSERT = insert(Diagnosis.__table__).returning(Diagnosis.__table__.c.id, Diagnosis.__table__.c.name)
+_MEDICATION_INSERT = insert(Medication.__table__)
+_PROTOCOL_INSERT = insert(TreatmentProtocol.__table__)
+_QUERY_LOG_INSERT = insert(QueryLog.__table__)
+
+# Applied to every new SQLite connection: WAL lets readers run alongside the writer, and
+# NORMAL sync is safe under WAL while skipping an fsync per commit
+_SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+)
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Configure a new SQLite DBAPI connection"""
+    cursor = dbapi_connection.cursor()
+    for pragma in _SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
 class DatabaseManager:
-    def __init__(self, database_url: str):
+    def __init__(self, database_url: str, *, pool_size: Optional[int] = None, max_overflow: Optional[int] = None,
+                 pool_timeout: float = 30, pool_recycle: int = 1800):
+        """Create the engine and session factory for a database URL
+        
+        pool_size + max_overflow caps how many sessions can hold a connection at once, so it
+        should be at least the number of concurrent tasks using the database; beyond that,
+        checkouts wait up to pool_timeout seconds and then fail. Sizes default to the
+        PEDIASSIST_DB_POOL_SIZE and PEDIASSIST_DB_MAX_OVERFLOW environment variables.
+        """
         self.database_url = database_url
+        url = make_url(database_url)
+        is_sqlite = url.get_backend_name() == "sqlite"
+        if is_sqlite:
+            # SQLite connections are local file handles, so pooling them buys nothing. In-memory
+            # databases keep SQLAlchemy's default single shared connection instead.
+            pool_options = {} if url.database in (None, "", ":memory:") else {"poolclass": NullPool}
+        else:
+            if pool_size is None:
+                pool_size = int(os.getenv("PEDIASSIST_DB_POOL_SIZE", "10"))
+            if max_overflow is None:
+                max_overflow = int(os.getenv("PEDIASSIST_DB_MAX_OVERFLOW", "20"))
+            pool_options = {
+                "pool_size": pool_size,
+                "max_overflow": max_overflow,
+                "pool_timeout": pool_timeout,
+                "pool_recycle": pool_recycle,
+                "pool_pre_ping": True,
+            }
+        
         self.engine = create_async_engine(
             database_url,
             echo=False,  # Set to True for SQL debugging
-            pool_size=10,
-            max_overflow=20,
-            pool_pre_ping=True,
+            **pool_options
         )
+        if is_sqlite:
+            event.listen(self.engine.sync_engine, "connect", _set_sqlite_pragmas)
         self.async_session = async_sessionmaker(
             self.engine,
             class_=AsyncSession,
             expire_on_commit=False
         )
+        self._initialized = False
+        self._connection_verified = False
+        # Created on first use, on the event loop that tracks usage
+        self._usage_queue: Optional[asyncio.Queue] = None
+        self._usage_flusher: Optional[asyncio.Task] = None
+        self.dropped_usage_records = 0
+    
+    async def aclose(self):
+        """Flush queued usage records, dispose of the engine's connection pool and forget this manager"""
+        queue, flusher = self._usage_queue, self._usage_flusher
+        self._usage_flusher = None
+        if flusher is not None and flusher.get_loop() is asyncio.get_running_loop():
+            if self._usage_flusher_running(flusher):
+                # Let the writer finish its in-flight batch and everything still queued
+                joined = asyncio.ensure_future(queue.join())
+                await asyncio.wait([joined, flusher], return_when=asyncio.FIRST_COMPLETED)
+                joined.cancel()
+                flusher.cancel()
+            # A cancelled writer still writes the batch it holds before it stops
+            await asyncio.wait([flusher])
+        elif flusher is not None:
+            flusher.cancel()
+        
+        # Whatever a stopped writer left behind is written here
+        batch = []
+        while queue is not None and not queue.empty():
+            batch.append(queue.get_nowait())
+        if batch:
+            await self._write_usage(batch)
+        
+        await self.engine.dispose()
+        if _MANAGERS.get(self.database_url) is self:
+            del _MANAGERS[self.database_url]
     
     async def create_tables(self):
         """Create all database tables"""
         logger.info("Creating database tables")
         async with self.engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(upgrade_schema)
         logger.info("Database tables created successfully")
     
     async def drop_tables(self):
@@ -48,10 +143,15 @@ class DatabaseManager:
     
     async def check_connection(self) -> bool:
         """Test database connection"""
+        # One successful probe is enough; pool_pre_ping covers liveness from then on
+        if self._connection_verified:
+            return True
+        
         try:
             async with self.engine.connect() as conn:
                 await conn.execute(text("SELECT 1"))
                 logger.info("Database connection successful")
+                self._connection_verified = True
                 return True
         except Exception as e:
             logger.error("Database connection failed", error=str(e))
@@ -67,31 +167,118 @@ class DatabaseManager:
     
     async def track_usage(self, operation: str, input_data: dict, output_data: dict):
         """Track API usage for analytics and monitoring"""
+        logger.info("API usage tracked", 
+                   operation=operation, 
+                   input_data=input_data, 
+                   output_data=output_data)
+        
+        age = input_data.get("age")
+        record = {
+            "user_id": str(input_data.get("user_id", "anonymous")),
+            "operation": operation,
+            "diagnosis_input": json.dumps(input_data, default=str),
+            "patient_age": age if isinstance(age, int) else None,
+            "treatment_plan_generated": operation == "treatment",
+        }
+        
+        # The request path only enqueues; a background task writes the records in batches
+        self._ensure_usage_flusher()
+        try:
+            self._usage_queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self.dropped_usage_records += 1
+            logger.warning("Usage queue full, dropping record", dropped=self.dropped_usage_records)
+    
+    def _ensure_usage_flusher(self):
+        """Run the batch writer on the current event loop, restarting it if it has stopped"""
+        loop = asyncio.get_running_loop()
+        flusher = self._usage_flusher
+        if flusher is not None and flusher.get_loop() is loop and self._usage_flusher_running(flusher):
+            return
+        
+        if flusher is not None and flusher.done() and not flusher.cancelled() and flusher.exception():
+            logger.error("Usage writer stopped, restarting", error=str(flusher.exception()))
+        if flusher is None or flusher.get_loop() is not loop:
+            # A queue belongs to the loop it is first awaited on, so each loop gets its own;
+            # records still pending from a previous loop move over
+            pending = self._usage_queue
+            self._usage_queue = asyncio.Queue(maxsize=_USAGE_QUEUE_SIZE)
+            while pending is not None and not pending.empty():
+                self._usage_queue.put_nowait(pending.get_nowait())
+        self._usage_flusher = loop.create_task(self._flush_usage(self._usage_queue))
+    
+    @staticmethod
+    def _usage_flusher_running(flusher: asyncio.Task) -> bool:
+        """Whether the batch writer is still taking records, rather than stopped or stopping"""
+        return not flusher.done() and not flusher.cancelling()
+    
+    async def _flush_usage(self, queue: asyncio.Queue):
+        """Write queued usage records in batches until cancelled"""
+        while True:
+            batch = [await queue.get()]
+            try:
+                if queue.qsize() < _USAGE_BATCH_SIZE - 1:
+                    await asyncio.sleep(_USAGE_FLUSH_INTERVAL)
+                while len(batch) < _USAGE_BATCH_SIZE and not queue.empty():
+                    batch.append(queue.get_nowait())
+            finally:
+                # Also reached when cancelled while gathering, so dequeued records are still written
+                try:
+                    await self._write_usage(batch)
+                finally:
+                    for _ in batch:
+                        queue.task_done()
+    
+    async def _write_usage(self, batch: List[dict]):
+        """Insert a batch of usage records with one statement"""
         try:
             async with self.async_session() as session:
-                # For now, just log the usage
-                logger.info("API usage tracked", 
-                           operation=operation, 
-                           input_data=input_data, 
-                           output_data=output_data)
-                # TODO: Implement actual usage tracking to database when models are ready
+                await session.execute(_QUERY_LOG_INSERT, batch)
                 await session.commit()
         except Exception as e:
-            logger.error("Failed to track usage", error=str(e))
+            logger.error("Failed to track usage", error=str(e), count=len(batch))
     
     async def get_usage_stats(self) -> dict:
         """Get usage statistics"""
-        # For now, return basic stats
+        # Every counter comes from one aggregate scan of the query log
+        operation = QueryLog.__table__.c.operation
+        statement = select(
+            func.count().label("total_requests"),
+            func.count().filter(operation == "diagnosis").label("diagnosis_requests"),
+            func.count().filter(operation == "treatment").label("treatment_requests"),
+            func.count().filter(operation == "communication").label("communication_requests"),
+            func.max(QueryLog.__table__.c.timestamp).label("last_updated"),
+        )
+        async with self.async_session() as session:
+            stats = (await session.execute(statement)).one()
+        
         return {
-            "total_requests": 0,
-            "diagnosis_requests": 0,
-            "treatment_requests": 0,
-            "communication_requests": 0,
-            "last_updated": "2024-01-01T00:00:00Z"
+            "total_requests": stats.total_requests,
+            "diagnosis_requests": stats.diagnosis_requests,
+            "treatment_requests": stats.treatment_requests,
+            "communication_requests": stats.communication_requests,
+            "last_updated": stats.last_updated.isoformat() if stats.last_updated else None
         }
 
+# One manager, and so one engine and connection pool, per database URL for the process
+_MANAGERS: Dict[str, DatabaseManager] = {}
+
+def get_database_manager(database_url: str) -> DatabaseManager:
+    """Return the shared manager for a database URL, creating it on first use"""
+    db_manager = _MANAGERS.get(database_url)
+    if db_manager is None:
+        db_manager = _MANAGERS[database_url] = DatabaseManager(database_url)
+    return db_manager
+
+def _freeze_rows(rows: Iterable[Dict[str, Any]]) -> Tuple[Mapping[str, Any], ...]:
+    """Make sample records read-only so seeding can never alter them between runs"""
+    return tuple(
+        MappingProxyType({key: tuple(value) if isinstance(value, list) else value for key, value in row.items()})
+        for row in rows
+    )
+
 # Sample data for initial database population
-SAMPLE_DIAGNOSES = [
+SAMPLE_DIAGNOSES = _freeze_rows([
     {
         "name": "Asthma",
         "icd10_code": "J45.909",
@@ -142,9 +329,9 @@ SAMPLE_DIAGNOSES = [
         "severity_levels": ["controlled", "refractory", "intractable"],
         "keywords": ["seizure", "convulsion", "epileptiform", "ictal"]
     }
-]
+])
 
-SAMPLE_MEDICATIONS = [
+SAMPLE_MEDICATIONS = _freeze_rows([
     {
         "generic_name": "Albuterol",
         "brand_names": ["ProAir", "Ventolin", "Proventil"],
@@ -210,9 +397,9 @@ SAMPLE_MEDICATIONS = [
         "strengths": ["100mg/mL", "250mg", "500mg", "750mg", "1000mg"],
         "mechanism_of_action": "Binds to synaptic vesicle protein 2A (SV2A)"
     }
-]
+])
 
-SAMPLE_TREATMENT_PROTOCOLS = [
+SAMPLE_TREATMENT_PROTOCOLS = _freeze_rows([
     {
         "diagnosis_name": "Asthma",
         "severity_level": "mild",
@@ -291,36 +478,103 @@ SAMPLE_TREATMENT_PROTOCOLS = [
         "follow_up_required": True,
         "emergency_indicators": ["persistent vomiting", "ketones >0.6", "altered mental status", "severe hypoglycemia"]
     }
-]
+])
+
+def _diagnosis_row(diagnosis_data: Mapping[str, Any]) -> dict:
+    """Map a sample diagnosis onto the diagnoses table columns"""
+    return {
+        "name": diagnosis_data["name"],
+        "icd10_code": diagnosis_data["icd10_code"],
+        "category": diagnosis_data["category"],
+        "age_range": diagnosis_data["age_group"],
+    }
+
+def _medication_row(medication_data: Mapping[str, Any]) -> dict:
+    """Map a sample medication onto the medications table columns"""
+    return {
+        "generic_name": medication_data["generic_name"],
+        "brand_names": list(medication_data["brand_names"]),
+        "category": medication_data["category"],
+        "pediatric_approved": medication_data["pediatric_approved"],
+    }
+
+def _protocol_row(protocol_data: Mapping[str, Any], diagnosis_id: int) -> dict:
+    """Map a sample treatment protocol onto the treatment_protocols table columns"""
+    return {
+        "diagnosis_id": diagnosis_id,
+        "severity_level": protocol_data["severity_level"],
+        "protocol_text": protocol_data["protocol"],
+        # Sample protocols are consensus summaries rather than graded guidelines
+        "evidence_level": protocol_data.get("evidence_level", "consensus"),
+    }
+
+async def _copy_rows(session: AsyncSession, table: Table, rows: List[dict]):
+    """Bulk load rows with PostgreSQL COPY through the session's asyncpg connection"""
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    
+    # COPY bypasses SQLAlchemy type processing, so JSON values are serialized here. Columns
+    # with a PostgreSQL ARRAY variant take the list as-is.
+    columns = list(rows[0])
+    json_columns = {
+        column.name for column in table.columns
+        if isinstance(column.type.dialect_impl(connection.dialect), JSON)
+    }
+    records = [
+        tuple(json.dumps(row[column]) if column in json_columns else row[column] for column in columns)
+        for row in rows
+    ]
+    await raw_connection.driver_connection.copy_records_to_table(table.name, records=records, columns=columns)
+
+async def _seed_diagnoses(session: AsyncSession, rows: List[dict], use_copy: bool) -> Dict[str, int]:
+    """Insert diagnosis rows and return their ids by name"""
+    diagnoses = Diagnosis.__table__
+    if use_copy:
+        await _copy_rows(session, diagnoses, rows)
+        result = await session.execute(
+            select(diagnoses.c.id, diagnoses.c.name).where(diagnoses.c.name.in_([row["name"] for row in rows]))
+        )
+    else:
+        result = await session.execute(_DIAGNOSIS_INSERT, rows)
+    return {name: diagnosis_id for diagnosis_id, name in result}
 
 async def populate_sample_data(session: AsyncSession):
     """Populate database with sample data"""
     logger.info("Populating database with sample data")
     
-    from .repository import RepositoryFactory
-    repo_factory = RepositoryFactory(session)
-    
-    # Create diagnoses
-    diagnosis_map = {}
-    for diagnosis_data in SAMPLE_DIAGNOSES:
-        diagnosis = await repo_factory.diagnoses.create(**diagnosis_data)
-        diagnosis_map[diagnosis_data["name"]] = diagnosis
-        logger.info(f"Created diagnosis: {diagnosis.name}")
-    
-    # Create medications
-    medication_map = {}
-    for medication_data in SAMPLE_MEDICATIONS:
-        medication = await repo_factory.medications.create(**medication_data)
-        medication_map[medication_data["generic_name"]] = medication
-        logger.info(f"Created medication: {medication.generic_name}")
-    
-    # Create treatment protocols
-    for protocol_data in SAMPLE_TREATMENT_PROTOCOLS:
-        diagnosis_name = protocol_data.pop("diagnosis_name")
-        if diagnosis_name in diagnosis_map:
-            protocol_data["diagnosis_id"] = diagnosis_map[diagnosis_name].id
-            protocol = await repo_factory.treatment_protocols.create(**protocol_data)
-            logger.info(f"Created treatment protocol: {protocol.severity_level} {diagnosis_name}")
+    # Each table is seeded with one bulk statement, all in a single transaction. On asyncpg,
+    # diagnoses and medications are streamed with COPY instead of a multi-row INSERT.
+    async with session.begin():
+        connection = await session.connection()
+        use_copy = connection.dialect.name == "postgresql" and connection.dialect.driver == "asyncpg"
+        if use_copy:
+            # The asyncpg adapter only opens its transaction when the first statement runs, and
+            # COPY goes straight to the driver; run a statement first so the COPYs join the transaction
+            await connection.execute(text("SELECT 1"))
+        
+        # Create diagnoses
+        diagnosis_map = await _seed_diagnoses(
+            session, [_diagnosis_row(diagnosis_data) for diagnosis_data in SAMPLE_DIAGNOSES], use_copy
+        )
+        logger.info("Created diagnoses", count=len(diagnosis_map))
+        
+        # Create medications
+        medication_rows = [_medication_row(medication_data) for medication_data in SAMPLE_MEDICATIONS]
+        if use_copy:
+            await _copy_rows(session, Medication.__table__, medication_rows)
+        else:
+            await session.execute(_MEDICATION_INSERT, medication_rows)
+        logger.info("Created medications", count=len(medication_rows))
+        
+        # Create treatment protocols; these go through INSERT so column defaults still apply
+        protocol_rows = [
+            _protocol_row(protocol_data, diagnosis_map[protocol_data["diagnosis_name"]])
+            for protocol_data in SAMPLE_TREATMENT_PROTOCOLS
+            if protocol_data["diagnosis_name"] in diagnosis_map
+        ]
+        if protocol_rows:
+            await session.execute(_PROTOCOL_INSERT, protocol_rows)
+        logger.info("Created treatment protocols", count=len(protocol_rows))
     
     logger.info("Sample data population completed")
 
@@ -328,7 +582,9 @@ async def init_database(database_url: str, populate_sample: bool = True):
     """Initialize the database with tables and optional sample data"""
     logger.info("Initializing database")
     
-    db_manager = DatabaseManager(database_url)
+    db_manager = get_database_manager(database_url)
+    if db_manager._initialized:
+        return db_manager
     
     # Test connection
     if not await db_manager.check_connection():
@@ -339,8 +595,9 @@ async def init_database(database_url: str, populate_sample: bool = True):
     
     # Populate sample data if requested
     if populate_sample:
-        async with db_manager.get_session() as session:
+        async with db_manager.async_session() as session:
             await populate_sample_data(session)
     
+    db_manager._initialized = True
     logger.info("Database initialization completed")
     return db_manager
\ No newline at end of file
@@ -0,0 +1,184 @@
+"""
+In-place schema upgrades for databases created by earlier releases
+"""
+
+from sqlalchemy import JSON, DateTime, inspect, literal, text
+from sqlalchemy import types as sqltypes
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateColumn, CreateTable
+import structlog
+
+from .models import Base
+
+logger = structlog.get_logger(__name__)
+
+def _add_missing_columns(connection: Connection):
+    """Add model columns that are missing from existing tables"""
+    inspector = inspect(connection)
+    quote = connection.dialect.identifier_preparer.quote
+
+    for table in Base.metadata.sorted_tables:
+        existing = {info["name"] for info in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable and column.server_default is None:
+                # Existing rows would have no value for it
+                logger.warning("Cannot add required column without a default",
+                               table=table.name, column=column.name)
+                continue
+            column_ddl = CreateColumn(column).compile(dialect=connection.dialect)
+            connection.execute(text(f"ALTER TABLE {quote(table.name)} ADD COLUMN {column_ddl}"))
+            logger.info("Added column", table=table.name, column=column.name)
+
+# Converts a JSON list to a varchar array. ALTER COLUMN ... USING cannot contain a subquery,
+# so the conversion lives in a session-scoped function.
+_JSON_TO_VARCHAR_ARRAY = """
+CREATE OR REPLACE FUNCTION pg_temp.pediassist_json_to_varchar_array(value json) RETURNS varchar[]
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT CASE WHEN json_typeof(value) = 'array'
+                THEN ARRAY(SELECT json_array_elements_text(value))::varchar[] END
+$$
+"""
+
+def _upgrade_string_list_columns(connection: Connection):
+    """Convert string lists stored as JSON to native PostgreSQL arrays and index them"""
+    if connection.dialect.name != "postgresql":
+        return
+    inspector = inspect(connection)
+    quote = connection.dialect.identifier_preparer.quote
+    function_created = False
+
+    for table in Base.metadata.sorted_tables:
+        existing = {info["name"]: info for info in inspector.get_columns(table.name)}
+        for column in table.columns:
+            array_type = column.type.dialect_impl(connection.dialect)
+            info = existing.get(column.name)
+            if not isinstance(array_type, sqltypes.ARRAY) or info is None or not isinstance(info["type"], JSON):
+                continue
+
+            if not function_created:
+                connection.execute(text(_JSON_TO_VARCHAR_ARRAY))
+                function_created = True
+            column_name = quote(column.name)
+            connection.execute(text(
+                f"ALTER TABLE {quote(table.name)} ALTER COLUMN {column_name} "
+                f"TYPE {array_type.compile(dialect=connection.dialect)} "
+                f"USING pg_temp.pediassist_json_to_varchar_array({column_name}::json)"
+            ))
+            logger.info("Converted column to array", table=table.name, column=column.name)
+
+def _copy_expression(connection: Connection, column) -> str:
+    """SELECT expression that fills values an older table allowed to be missing"""
+    column_name = connection.dialect.identifier_preparer.quote(column.name)
+    if isinstance(column.type, DateTime) and column.server_default is not None:
+        return f"COALESCE({column_name}, CURRENT_TIMESTAMP)"
+    if not column.nullable and column.default is not None and column.default.is_scalar:
+        default = literal(column.default.arg, column.type).compile(
+            dialect=connection.dialect, compile_kwargs={"literal_binds": True}
+        )
+        return f"COALESCE({column_name}, {default})"
+    return column_name
+
+def _server_timestamp_columns():
+    """Yield (table, column) for every timestamp the database server stamps itself"""
+    for table in Base.metadata.sorted_tables:
+        for column in table.columns:
+            if isinstance(column.type, DateTime) and column.server_default is not None:
+                yield table, column
+
+def _upgrade_timestamp_columns(connection: Connection):
+    """Give timestamp columns created with Python-side defaults their server default"""
+    inspector = inspect(connection)
+    quote = connection.dialect.identifier_preparer.quote
+    dialect = connection.dialect.name
+    sqlite_rebuilds = []
+
+    for table, column in _server_timestamp_columns():
+        existing = {info["name"]: info for info in inspector.get_columns(table.name)}.get(column.name)
+        if existing is None:
+            continue
+        table_name, column_name = quote(table.name), quote(column.name)
+
+        if dialect == "postgresql":
+            if not getattr(existing["type"], "timezone", False):
+                # Earlier releases stored naive UTC values
+                connection.execute(text(
+                    f"ALTER TABLE {table_name} ALTER COLUMN {column_name} "
+                    f"TYPE TIMESTAMP WITH TIME ZONE USING {column_name} AT TIME ZONE 'UTC'"
+                ))
+            if existing["default"] is None:
+                connection.execute(text(f"ALTER TABLE {table_name} ALTER COLUMN {column_name} SET DEFAULT now()"))
+        elif existing["default"] is None and dialect == "sqlite":
+            if table not in sqlite_rebuilds:
+                sqlite_rebuilds.append(table)
+        elif existing["default"] is None:
+            logger.warning("Timestamp column has no server default; new rows will have no timestamp",
+                           table=table.name, column=column.name, dialect=dialect)
+
+    for table in sqlite_rebuilds:
+        _rebuild_sqlite_table(connection, table)
+
+def _rebuild_sqlite_table(connection: Connection, table):
+    """Recreate a SQLite table from its model, keeping its rows"""
+    # SQLite cannot alter a column default, so the table is rebuilt the way its docs prescribe:
+    # create the new table, copy the rows, drop the old table and rename the new one into place.
+    # Indexes go with the old table and are recreated by _sync_indexes.
+    quote = connection.dialect.identifier_preparer.quote
+    table_name, staging_name = quote(table.name), quote(f"{table.name}__upgrade")
+    existing = {info["name"] for info in inspect(connection).get_columns(table.name)}
+
+    create_ddl = str(CreateTable(table).compile(dialect=connection.dialect)).strip()
+    connection.execute(text(create_ddl.replace(f"CREATE TABLE {table_name}", f"CREATE TABLE {staging_name}", 1)))
+
+    columns = [column for column in table.columns if column.name in existing]
+    targets = ", ".join(quote(column.name) for column in columns)
+    sources = ", ".join(_copy_expression(connection, column) for column in columns)
+    connection.execute(text(f"INSERT INTO {staging_name} ({targets}) SELECT {sources} FROM {table_name}"))
+    connection.execute(text(f"DROP TABLE {table_name}"))
+    connection.execute(text(f"ALTER TABLE {staging_name} RENAME TO {table_name}"))
+    logger.info("Rebuilt table with server defaults", table=table.name)
+
+# Single-column indexes from earlier releases whose lookups the composite indexes now serve
+_SUPERSEDED_INDEXES = (
+    ("query_log", "ix_query_log_user_id"),
+    ("treatment_protocols", "ix_treatment_protocols_severity_level"),
+    ("treatment_protocols", "ix_treatment_protocols_evidence_level"),
+)
+
+def _index_definition(index_info: dict) -> tuple:
+    """Key columns and INCLUDE columns of a reflected index"""
+    include = index_info.get("dialect_options", {}).get("postgresql_include") or ()
+    return tuple(index_info["column_names"]), tuple(include)
+
+def _sync_indexes(connection: Connection):
+    """Create model indexes missing from existing tables and rebuild ones whose columns changed"""
+    inspector = inspect(connection)
+    quote = connection.dialect.identifier_preparer.quote
+    is_postgresql = connection.dialect.name == "postgresql"
+
+    for table_name, index_name in _SUPERSEDED_INDEXES:
+        if any(info["name"] == index_name for info in inspector.get_indexes(table_name)):
+            connection.execute(text(f"DROP INDEX {quote(index_name)}"))
+            logger.info("Dropped superseded index", table=table_name, index=index_name)
+
+    for table in Base.metadata.sorted_tables:
+        existing = {info["name"]: info for info in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            info = existing.get(index.name)
+            if info is not None:
+                # INCLUDE columns are only emitted, and only reflected, on PostgreSQL
+                include = tuple(index.dialect_options["postgresql"]["include"] or ()) if is_postgresql else ()
+                if _index_definition(info) == (tuple(column.name for column in index.columns), include):
+                    continue
+                index.drop(connection)
+                logger.info("Rebuilding index with new columns", table=table.name, index=index.name)
+            # Indexes limited to another dialect are skipped by create itself
+            index.create(connection)
+
+def upgrade_schema(connection: Connection):
+    """Bring tables that already existed before create_all up to the current models"""
+    _add_missing_columns(connection)
+    _upgrade_string_list_columns(connection)
+    _upgrade_timestamp_columns(connection)
+    _sync_indexes(connection)
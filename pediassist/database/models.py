@@ -6,7 +6,7 @@ from datetime import datetime, date
 from typing import Optional, List, Dict, Any
 from sqlalchemy import (
     Column, Integer, String, Text, Boolean, DateTime, Date, 
-    ForeignKey, JSON, ARRAY, UniqueConstraint, Index
+    ForeignKey, JSON, ARRAY, UniqueConstraint, Index, func
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, Mapped, mapped_column
@@ -19,6 +19,10 @@ except ImportError:
     POSTGRES_AVAILABLE = False
     PGArray = None
 
+# String lists are native arrays on PostgreSQL, where a GIN index can serve membership
+# queries, and JSON everywhere else
+StringList = JSON().with_variant(PGArray(String), "postgresql") if POSTGRES_AVAILABLE else JSON
+
 Base = declarative_base()
 
 class Diagnosis(Base):
@@ -30,12 +34,13 @@ class Diagnosis(Base):
     category: Mapped[str] = mapped_column(String(100), nullable=False, index=True)
     age_range: Mapped[Optional[str]] = mapped_column(String(50))
     
-    # Relationships
+    # Relationships; collections are loaded with one IN query per batch of diagnoses, since
+    # async sessions cannot lazy-load them one diagnosis at a time
     treatment_protocols: Mapped[List["TreatmentProtocol"]] = relationship(
-        "TreatmentProtocol", back_populates="diagnosis", cascade="all, delete-orphan"
+        "TreatmentProtocol", back_populates="diagnosis", cascade="all, delete-orphan", lazy="selectin"
     )
     communication_templates: Mapped[List["CommunicationTemplate"]] = relationship(
-        "CommunicationTemplate", back_populates="diagnosis", cascade="all, delete-orphan"
+        "CommunicationTemplate", back_populates="diagnosis", cascade="all, delete-orphan", lazy="selectin"
     )
     
     def __repr__(self) -> str:
@@ -46,10 +51,10 @@ class TreatmentProtocol(Base):
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     diagnosis_id: Mapped[int] = mapped_column(Integer, ForeignKey("diagnoses.id"), nullable=False)
-    severity_level: Mapped[str] = mapped_column(String(50), nullable=False, index=True)
+    severity_level: Mapped[str] = mapped_column(String(50), nullable=False)
     protocol_text: Mapped[str] = mapped_column(Text, nullable=False)
-    evidence_level: Mapped[str] = mapped_column(String(10), nullable=False, index=True)
-    last_updated: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    evidence_level: Mapped[str] = mapped_column(String(10), nullable=False)
+    last_updated: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     version: Mapped[int] = mapped_column(Integer, default=1)
     
     # Relationships
@@ -58,9 +63,15 @@ class TreatmentProtocol(Base):
     
     __table_args__ = (
         UniqueConstraint('diagnosis_id', 'severity_level', 'version'),
-        Index('idx_protocol_diagnosis_severity', 'diagnosis_id', 'severity_level'),
+        # Covers protocol lookups by diagnosis and severity without a heap fetch for the evidence level
+        Index('idx_protocol_diagnosis_severity', 'diagnosis_id', 'severity_level',
+              postgresql_include=['evidence_level']),
     )
     
+    # Server-generated timestamps come back with the INSERT/UPDATE itself, so reading them
+    # afterwards never triggers a lazy refresh (which AsyncSession cannot do implicitly)
+    __mapper_args__ = {"eager_defaults": True}
+    
     def __repr__(self) -> str:
         return f"<TreatmentProtocol(id={self.id}, diagnosis_id={self.diagnosis_id}, severity='{self.severity_level}')>"
 
@@ -69,14 +80,18 @@ class Medication(Base):
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     generic_name: Mapped[str] = mapped_column(String(255), nullable=False, unique=True, index=True)
-    brand_names: Mapped[Optional[List[str]]] = mapped_column(JSON)
+    brand_names: Mapped[Optional[List[str]]] = mapped_column(StringList)
     category: Mapped[str] = mapped_column(String(100), nullable=False, index=True)
     pediatric_approved: Mapped[bool] = mapped_column(Boolean, default=True, index=True)
     age_restrictions: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON)
     
     # Relationships
     dosing_guidelines: Mapped[List["DosingGuideline"]] = relationship(
-        "DosingGuideline", back_populates="medication", cascade="all, delete-orphan"
+        "DosingGuideline", back_populates="medication", cascade="all, delete-orphan", lazy="selectin"
+    )
+    
+    __table_args__ = (
+        Index('idx_med_brand_names_gin', 'brand_names', postgresql_using='gin').ddl_if(dialect='postgresql'),
     )
     
     def __repr__(self) -> str:
@@ -91,7 +106,7 @@ class DosingGuideline(Base):
     weight_based_dosing: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON)
     age_based_dosing: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON)
     max_dose: Mapped[Optional[str]] = mapped_column(String(100))
-    contraindications: Mapped[Optional[List[str]]] = mapped_column(JSON)
+    contraindications: Mapped[Optional[List[str]]] = mapped_column(StringList)
     
     # Relationships
     medication: Mapped["Medication"] = relationship("Medication", back_populates="dosing_guidelines")
@@ -101,6 +116,7 @@ class DosingGuideline(Base):
     __table_args__ = (
         Index('idx_dosing_medication', 'medication_id'),
         Index('idx_dosing_diagnosis', 'diagnosis_id'),
+        Index('idx_dosing_contraindications_gin', 'contraindications', postgresql_using='gin').ddl_if(dialect='postgresql'),
     )
     
     def __repr__(self) -> str:
@@ -116,7 +132,9 @@ class ClinicalGuideline(Base):
     embeddings: Mapped[Optional[Any]] = mapped_column(JSON)  # For vector search (simplified)
     publish_date: Mapped[Optional[date]] = mapped_column(Date)
     url: Mapped[Optional[str]] = mapped_column(String(500))
-    last_updated: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    last_updated: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __mapper_args__ = {"eager_defaults": True}
     
     def __repr__(self) -> str:
         return f"<ClinicalGuideline(id={self.id}, source='{self.source}', title='{self.title[:50]}...')>"
@@ -146,14 +164,24 @@ class QueryLog(Base):
     __tablename__ = "query_log"
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    user_id: Mapped[str] = mapped_column(String(255), nullable=False, index=True)  # Hashed, not identifiable
+    user_id: Mapped[str] = mapped_column(String(255), nullable=False)  # Hashed, not identifiable
+    operation: Mapped[Optional[str]] = mapped_column(String(50))  # diagnosis, treatment, communication
     diagnosis_input: Mapped[str] = mapped_column(Text, nullable=False)
     patient_age: Mapped[Optional[int]] = mapped_column(Integer)
-    timestamp: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+    timestamp: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), index=True)
     treatment_plan_generated: Mapped[bool] = mapped_column(Boolean, default=False, index=True)
     tokens_used: Mapped[Optional[int]] = mapped_column(Integer)
     response_time_ms: Mapped[Optional[int]] = mapped_column(Integer)
     
+    __table_args__ = (
+        # Per-user usage reads filter on user and time range; the included columns let them
+        # aggregate from the index alone. Descending time order is a backward scan of it.
+        Index('idx_querylog_user_time', 'user_id', 'timestamp',
+              postgresql_include=['treatment_plan_generated', 'tokens_used', 'response_time_ms']),
+    )
+    
+    __mapper_args__ = {"eager_defaults": True}
+    
     def __repr__(self) -> str:
         return f"<QueryLog(id={self.id}, user_id='{self.user_id[:8]}...', timestamp='{self.timestamp}')>"
 
@@ -166,7 +194,9 @@ class License(Base):
     expiry_date: Mapped[Optional[date]] = mapped_column(Date, index=True)
     feature_flags: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, index=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    
+    __mapper_args__ = {"eager_defaults": True}
     
     def __repr__(self) -> str:
         return f"<License(id={self.id}, organization='{self.organization}', active={self.is_active})>"
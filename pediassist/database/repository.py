@@ -233,9 +233,9 @@ class QueryLogRepository:
     
     async def get_usage_stats(self, user_id: str, days: int = 30) -> Dict[str, Any]:
         """Get usage statistics for a user"""
-        from datetime import datetime, timedelta
+        from datetime import datetime, timedelta, timezone
         
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
+        cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
         
         result = await self.session.execute(
             select(
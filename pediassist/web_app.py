@@ -16,7 +16,7 @@ from .config import settings
 from .core.diagnosis_parser import DiagnosisParser
 from .core.treatment_generator import TreatmentGenerator
 from .core.communication_engine import CommunicationEngine
-from .database import DatabaseManager
+from .database import get_database_manager
 from .llm.provider import LLMManager
 from .security import license_manager
 
@@ -63,7 +63,7 @@ class CommunicationRequest(BaseModel):
     language: str = "english"
 
 # Initialize core components
-db_manager = DatabaseManager(settings.database_url)
+db_manager = get_database_manager(settings.database_url)
 
 # Create LLM config dictionary
 llm_config = {
@@ -81,6 +81,18 @@ diagnosis_parser = DiagnosisParser()
 treatment_generator = TreatmentGenerator()
 communication_engine = CommunicationEngine()
 
+@app.on_event("startup")
+async def startup():
+    """Create missing tables so usage tracking and stats work on a fresh database"""
+    # An unreachable database is reported by /api/status rather than failing startup
+    if await db_manager.check_connection():
+        await db_manager.create_tables()
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Flush pending usage records and release database connections"""
+    await db_manager.aclose()
+
 # Dependency to check license
 def verify_license():
     """Verify that a valid license is configured"""
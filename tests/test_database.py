@@ -0,0 +1,124 @@
+"""
+Tests for database seeding and usage tracking against SQLite
+"""
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+pytest.importorskip("greenlet")
+
+from sqlalchemy import func, inspect, select, text
+
+from pediassist.database import (
+    SAMPLE_DIAGNOSES,
+    SAMPLE_MEDICATIONS,
+    DatabaseManager,
+    populate_sample_data,
+)
+from pediassist.database.models import Diagnosis, Medication, QueryLog, TreatmentProtocol
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    return f"sqlite+aiosqlite:///{tmp_path / 'pediassist.db'}"
+
+
+@pytest.fixture
+async def db_manager(database_url):
+    manager = DatabaseManager(database_url)
+    await manager.create_tables()
+    yield manager
+    await manager.aclose()
+
+
+async def count_rows(manager, model):
+    async with manager.async_session() as session:
+        return (await session.execute(select(func.count()).select_from(model.__table__))).scalar_one()
+
+
+async def test_create_tables_upgrades_legacy_query_log(database_url):
+    manager = DatabaseManager(database_url)
+    try:
+        async with manager.engine.begin() as conn:
+            # query_log as created before server-side timestamps and the operation column
+            await conn.execute(text(
+                "CREATE TABLE query_log (id INTEGER PRIMARY KEY, user_id VARCHAR(255) NOT NULL, "
+                "diagnosis_input TEXT NOT NULL, patient_age INTEGER, timestamp DATETIME NOT NULL, "
+                "treatment_plan_generated BOOLEAN, tokens_used INTEGER, response_time_ms INTEGER)"
+            ))
+            await conn.execute(text(
+                "INSERT INTO query_log (user_id, diagnosis_input, timestamp) VALUES ('legacy', '{}', '2024-01-01 00:00:00')"
+            ))
+
+        await manager.create_tables()
+        await manager.track_usage("diagnosis", {"age": 6}, {})
+        await manager.aclose()
+
+        async with manager.engine.connect() as conn:
+            indexes = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_indexes("query_log"))
+        assert "idx_querylog_user_time" in {index["name"] for index in indexes}
+
+        stats = await manager.get_usage_stats()
+        assert stats["total_requests"] == 2
+        assert stats["diagnosis_requests"] == 1
+        assert stats["last_updated"] > "2024-01-01"
+    finally:
+        await manager.aclose()
+
+
+async def test_populate_sample_data(db_manager):
+    async with db_manager.async_session() as session:
+        await populate_sample_data(session)
+
+    assert await count_rows(db_manager, Diagnosis) == len(SAMPLE_DIAGNOSES)
+    assert await count_rows(db_manager, Medication) == len(SAMPLE_MEDICATIONS)
+
+    async with db_manager.async_session() as session:
+        protocols = (await session.execute(
+            select(Diagnosis.__table__.c.name, TreatmentProtocol.__table__.c.severity_level)
+            .join(Diagnosis.__table__)
+        )).all()
+    assert ("Asthma", "mild") in protocols
+
+
+async def test_usage_stats_empty(db_manager):
+    stats = await db_manager.get_usage_stats()
+
+    assert stats == {
+        "total_requests": 0,
+        "diagnosis_requests": 0,
+        "treatment_requests": 0,
+        "communication_requests": 0,
+        "last_updated": None,
+    }
+
+
+async def test_track_usage_is_counted_in_usage_stats(database_url, db_manager):
+    for operation in ("diagnosis", "treatment", "treatment", "communication"):
+        await db_manager.track_usage(operation, {"age": 6, "chief_complaint": "cough"}, {})
+
+    # Closing flushes every queued record
+    await db_manager.aclose()
+    reader = DatabaseManager(database_url)
+    try:
+        stats = await reader.get_usage_stats()
+        assert await count_rows(reader, QueryLog) == 4
+    finally:
+        await reader.aclose()
+
+    assert stats["total_requests"] == 4
+    assert stats["diagnosis_requests"] == 1
+    assert stats["treatment_requests"] == 2
+    assert stats["communication_requests"] == 1
+    assert stats["last_updated"] is not None
+
+
+async def test_track_usage_restarts_stopped_writer(db_manager):
+    await db_manager.track_usage("diagnosis", {}, {})
+    db_manager._usage_flusher.cancel()
+
+    await db_manager.track_usage("diagnosis", {}, {})
+
+    assert not db_manager._usage_flusher.done()
+    await db_manager.aclose()
+    assert await count_rows(db_manager, QueryLog) == 2
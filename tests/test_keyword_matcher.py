@@ -0,0 +1,80 @@
+"""
+Tests for single-pass multi-keyword matching
+"""
+
+from pediassist.core.keyword_matcher import KeywordMatcher
+
+
+def test_finds_keyword_and_its_prefix_keyword():
+    matcher = KeywordMatcher([("fever", "fever"), ("fevers", "fever")])
+
+    assert matcher.find("recurrent fevers at night") == {"fever", "fevers"}
+    assert matcher.find("low grade fever") == {"fever"}
+
+
+def test_finds_keyword_inside_a_longer_word():
+    matcher = KeywordMatcher([("infant", "age"), ("infantile spasms", "neuro")])
+
+    assert matcher.find("infantile spasms since birth") == {"infant", "infantile spasms"}
+    assert matcher.find("infantile colic") == {"infant"}
+
+
+def test_finds_overlapping_keywords():
+    matcher = KeywordMatcher([("chest pain", "cardiac"), ("pain", "pain"), ("ain", "suffix")])
+
+    assert matcher.find("sharp chest pain") == {"chest pain", "pain", "ain"}
+
+
+def test_finds_each_keyword_once_however_often_it_occurs():
+    matcher = KeywordMatcher([("cough", "respiratory")])
+
+    assert matcher.find("cough, cough and more cough") == {"cough"}
+
+
+def test_keyword_with_several_payloads():
+    matcher = KeywordMatcher([("rash", "dermatology"), ("rash", "infectious"), ("itch", "dermatology")])
+
+    assert matcher.payloads["rash"] == frozenset({"dermatology", "infectious"})
+    assert matcher.find_payloads("itchy rash") == {"dermatology", "infectious"}
+
+
+def test_duplicate_keywords_are_merged():
+    matcher = KeywordMatcher([("wheeze", 1), ("wheeze", 1), ("wheeze", 2)])
+
+    assert matcher.payloads == {"wheeze": frozenset({1, 2})}
+    assert matcher.find("audible wheeze") == {"wheeze"}
+
+
+def test_empty_keyword_list():
+    matcher = KeywordMatcher([])
+
+    assert matcher.payloads == {}
+    assert matcher.find("any text at all") == set()
+    assert matcher.find_payloads("any text at all") == set()
+
+
+def test_empty_keywords_are_ignored():
+    matcher = KeywordMatcher([("", "nothing"), ("vomit", "gi")])
+
+    assert matcher.find("vomiting") == {"vomit"}
+    assert "" not in matcher.payloads
+
+
+def test_find_payloads_without_matches():
+    matcher = KeywordMatcher([("seizure", "neuro"), ("fever", "infectious")])
+
+    assert matcher.find_payloads("routine well child visit") == set()
+
+
+def test_matching_is_case_sensitive():
+    matcher = KeywordMatcher([("asthma", "respiratory")])
+
+    assert matcher.find("Asthma") == set()
+    assert matcher.find("asthma") == {"asthma"}
+
+
+def test_accepts_a_generator_of_pairs():
+    matcher = KeywordMatcher((keyword, index) for index, keyword in enumerate(["otitis", "otitis media"]))
+
+    assert matcher.find("acute otitis media") == {"otitis", "otitis media"}
+    assert matcher.find_payloads("acute otitis media") == {0, 1}
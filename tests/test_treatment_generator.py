@@ -0,0 +1,45 @@
+"""
+Tests for batch medication dosing
+"""
+
+from dataclasses import asdict
+
+import pytest
+
+from pediassist.core import treatment_generator
+from pediassist.core.treatment_generator import TreatmentGenerator
+
+DIAGNOSES = ["fever", "pneumonia", "bacterial ear infection", "asthma", "viral infection", "strep throat"]
+AGE_GROUPS = ["newborn", "infant", "toddler", "preschool", "school_age", "adolescent"]
+WEIGHTS_KG = [3.4, 8.25, None, 17.9, 0, 52.6]
+
+
+@pytest.fixture
+def generator():
+    return TreatmentGenerator()
+
+
+@pytest.mark.parametrize("numpy_available", [True, False])
+def test_batch_matches_per_patient_doses(generator, monkeypatch, numpy_available):
+    if numpy_available:
+        pytest.importorskip("numpy")
+    monkeypatch.setattr(treatment_generator, "NUMPY_AVAILABLE", numpy_available)
+
+    batch = generator.generate_medication_doses_batch(DIAGNOSES, AGE_GROUPS, WEIGHTS_KG)
+
+    expected = [
+        generator.generate_medication_doses(diagnosis, age_group, weight_kg)
+        for diagnosis, age_group, weight_kg in zip(DIAGNOSES, AGE_GROUPS, WEIGHTS_KG)
+    ]
+    assert [[asdict(dose) for dose in doses] for doses in batch] == \
+        [[asdict(dose) for dose in doses] for doses in expected]
+    assert any(dose.dose.endswith(" mg") for doses in batch for dose in doses)
+
+
+def test_batch_of_no_patients(generator):
+    assert generator.generate_medication_doses_batch([], [], []) == []
+
+
+def test_batch_rejects_mismatched_lengths(generator):
+    with pytest.raises(ValueError, match="same length"):
+        generator.generate_medication_doses_batch(["fever", "pneumonia"], ["infant"], [8.0, 20.0])